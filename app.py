@@ -1,42 +1,1092 @@
-from flask import Flask, request, jsonify, send_file, render_template_string
+from flask import Flask, request, jsonify, send_file, render_template_string, g, has_request_context
 import sqlite3
 import pandas as pd
+import numpy as np
 import zipfile
 import io
-from datetime import datetime
+import threading
+import multiprocessing
+import functools
+import contextlib
+import time
+import os
+import sys
+import gzip
+import shutil
+import calendar
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+from datetime import datetime, timedelta, timezone
 
 app = Flask(__name__)
 DB_NAME = 'forecast_v4.db'
 
-# 지역 정렬 순서 정의
+# 기초 지역/카테고리 (최초 실행 시 metadata 테이블에 1회 시드, 이후에는 DB 가 기준)
 REGIONS_ORDER = ['중앙', '강북', '서대문', '고양', '의정부', '남양주', '강릉', '원주']
 CATEGORIES_ORDER = ['출동보안', '고ARPU', '영상보안(SP)', '시스템 보안(SP)', '영상보안(KT/비대면)', '시스템 보안(SP+KT/비대면)']
+DEFAULT_DIMENSIONS = {'region': REGIONS_ORDER, 'category': CATEGORIES_ORDER}
+
+# 회의자료 팩 병렬 렌더링 워커 수 (None 이면 CPU 코어 수)
+REPORT_WORKERS = None
+
+# 인메모리 읽기 복제본 사용 여부와 데이터 버전 확인 주기(초)
+READ_REPLICA = False
+REPLICA_REFRESH_SECONDS = 1.0
+
+# 무거운 요청 동시 실행 한도: 엔드포인트 → (동시 실행 수, 대기열 길이, 최대 대기 초)
+ADMISSION_LIMITS = {
+    'download': (2, 4, 30),
+    'download_pack': (2, 4, 30),
+    'upload_excel': (1, 2, 30),
+    'backup': (1, 0, 0),
+    'snapshot': (1, 0, 0),
+    'simulate': (2, 4, 10),
+}
+
+# 온라인 백업: 저장 위치, 보관 개수, 주기(시간, None 이면 자동 백업 안 함), 단계당 페이지 수/단계 간 휴식(초)
+BACKUP_DIR = 'backups'
+BACKUP_KEEP = 14
+BACKUP_INTERVAL_HOURS = 24
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+BACKUP_MAX_RESTARTS = 3
+# 백업/스냅샷 스케줄러: 서버 프로세스에서 자동 시작 (벤치마크/일회성 스크립트에서 import 할 때는 False 로)
+SCHEDULERS_ENABLED = True
+
+# 조직(테넌트)별 DB 분리: 경로 접두사 /t/<조직ID>/... 또는 X-Tenant-ID 헤더, 둘 다 없으면 DB_NAME
+# 한 프로세스에서 최근 사용한 TENANT_CACHE_SIZE 개 조직의 연결/캐시만 유지, TENANT_IDLE_SECONDS 동안 안 쓰면 정리
+TENANT_DIR = 'tenants'
+TENANT_HEADER = 'X-Tenant-ID'
+TENANT_CACHE_SIZE = 32
+TENANT_IDLE_SECONDS = 600
+TENANT_POOL_SIZE = 4
+TENANT_AUTO_CREATE = False
+
+# 마감 스냅샷(close freeze): 체크포인트 이름 → (매월 일자, 'HH:MM'), 일자 -1 은 말일
+# 체크포인트 이후 SNAPSHOT_SERVE_HOURS 동안 대시보드/내보내기는 고정된 스냅샷 결과를 그대로 제공 (?live=1 이면 실시간)
+SNAPSHOT_CHECKPOINTS = {'4w': (28, '09:00'), 'close': (-1, '18:00')}
+SNAPSHOT_SERVE_HOURS = 24
+SNAPSHOT_POLL_SECONDS = 30
+# 미리 렌더링한 스냅샷 결과물의 메모리 캐시 상한 (프로세스 전체, 모든 조직 합계). 넘치면 오래 안 쓴 것부터 버리고 DB 에서 다시 읽음
+SNAPSHOT_CACHE_BYTES = 64 * 1024 * 1024
+
+# 목표 배분 시뮬레이션: 기본/최대 시나리오 수, 청크 크기, 프로세스 풀을 쓰기 시작하는 난수 개수, 4주차→마감 비율 기본 변동성(log)
+SIMULATION_SCENARIOS = 5000
+SIMULATION_MAX_SCENARIOS = 200000
+SIMULATION_CHUNK = 10000
+SIMULATION_POOL_MIN_DRAWS = 5000000
+SIMULATION_DEFAULT_SIGMA = 0.15
+
+# SQL 문 모음: 실행 시점 조회/저장 쿼리는 모두 여기서 이름으로 꺼내 씀 (benchmark.py plans 로 실행 계획/시간 점검)
+# 스키마 생성/이관용 DDL 과 PRAGMA 는 init_db 쪽에 그대로 둠
+SQL = {
+    'data_version': "SELECT version FROM data_version WHERE id = 1",
+    'metadata_version': "SELECT version FROM metadata_version WHERE id = 1",
+    'targets_version': "SELECT version FROM targets_version WHERE id = 1",
+    # 이관 필요 여부 확인 (구버전 테이블/컬럼)
+    'migration_tables': "SELECT name, type FROM sqlite_master WHERE name IN ('metadata', 'actuals', 'targets', 'actuals_data', 'actuals_monthly', 'snapshots', 'snapshot_actuals')",
+    'migration_without_rowid': "SELECT wr FROM pragma_table_list WHERE name = ?",
+    'migration_columns': "SELECT name FROM pragma_table_info(?)",
+    'registry': "SELECT id, type, value, sort_order, active FROM metadata ORDER BY type, sort_order, id",
+    # 목표는 TargetsMatrix 로 한 번에 적재 (건별 조회 없음)
+    'targets': "SELECT region_id, category_id, new_target, cancel_target FROM targets_data",
+    # 대시보드: 카테고리 내 지역별 최신 순증 마감 실적 (목표는 TargetsMatrix 에서)
+    'dashboard_actuals': """
+        SELECT r.id, (SELECT IFNULL(new_actual_close, 0) - IFNULL(cancel_actual_close, 0) FROM actuals_data
+                      WHERE region_id = r.id AND category_id = ? ORDER BY ts DESC, id DESC LIMIT 1)
+        FROM metadata r WHERE r.type = 'region'""",
+    'replica_last_id': "SELECT IFNULL(MAX(id), 0) FROM actuals_data",
+    'replica_latest': """
+        SELECT a.region_id, a.category_id, a.ts, a.id, a.new_actual_4w, a.new_actual_close, a.cancel_actual_4w, a.cancel_actual_close
+        FROM metadata r JOIN metadata k
+        JOIN actuals_data a ON a.id = (SELECT id FROM actuals_data WHERE region_id = r.id AND category_id = k.id ORDER BY ts DESC, id DESC LIMIT 1)
+        WHERE r.type = 'region' AND k.type = 'category'""",
+    'replica_since': """
+        SELECT region_id, category_id, ts, id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close
+        FROM actuals_data WHERE id > ? ORDER BY id""",
+    'save_target': "INSERT OR REPLACE INTO targets_data (region_id, category_id, new_target, cancel_target) VALUES (?, ?, ?, ?)",
+    'save_actual': """INSERT INTO actuals_data (region_id, category_id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close)
+                      VALUES (?, ?, ?, ?, ?, ?)""",
+    'save_metadata': """
+        INSERT INTO metadata (type, value, sort_order, active)
+        VALUES (:type, :value, COALESCE(:sort_order, (SELECT IFNULL(MAX(sort_order), -1) + 1 FROM metadata WHERE type = :type)), :active)
+        ON CONFLICT(type, value) DO UPDATE SET sort_order = COALESCE(:sort_order, sort_order), active = :active""",
+    'download': """
+        SELECT region, category, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, timestamp
+        FROM actuals ORDER BY timestamp DESC""",
+    'pack': """
+        SELECT region_id, category_id,
+               IFNULL(new_actual_4w, 0) as new_actual_4w, IFNULL(new_actual_close, 0) as new_actual_close,
+               IFNULL(cancel_actual_4w, 0) as cancel_actual_4w, IFNULL(cancel_actual_close, 0) as cancel_actual_close, ts
+        FROM actuals_data ORDER BY ts DESC, id DESC""",
+    'history_range': """
+        SELECT ts, id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close FROM actuals_data
+        WHERE region_id = ? AND category_id = ? AND ts >= ? AND ts <= ? ORDER BY ts, id""",
+    # 마감 스냅샷: 지역 x 카테고리별 최신 실적과 목표를 한 번에 복사
+    'snapshot_find': "SELECT id FROM snapshots WHERE label = ? AND period = ?",
+    'snapshot_create': "INSERT INTO snapshots (label, period, checkpoint_at, created_at, data_version) VALUES (?, ?, ?, ?, ?)",
+    'snapshot_freeze': """
+        INSERT INTO snapshot_rows (snapshot_id, region_id, category_id, new_target, cancel_target,
+                                   new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, ts)
+        SELECT ?, r.id, k.id, t.new_target, t.cancel_target, a.new_actual_4w, a.new_actual_close, a.cancel_actual_4w, a.cancel_actual_close, a.ts
+        FROM metadata r JOIN metadata k
+        LEFT JOIN targets_data t ON t.region_id = r.id AND t.category_id = k.id
+        LEFT JOIN actuals_data a ON a.id = (SELECT id FROM actuals_data WHERE region_id = r.id AND category_id = k.id ORDER BY ts DESC, id DESC LIMIT 1)
+        WHERE r.type = 'region' AND k.type = 'category' AND (t.region_id IS NOT NULL OR a.id IS NOT NULL)""",
+    # 내보내기(download.zip/pack.xlsx)용: 고정 시점의 실적 전체 이력을 스냅샷 쪽에 복사 (실시간 내보내기와 같은 행 집합)
+    'snapshot_freeze_actuals': """
+        INSERT INTO snapshot_actuals (snapshot_id, actual_id, region_id, category_id,
+                                      new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, ts)
+        SELECT ?, id, region_id, category_id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, ts
+        FROM actuals_data""",
+    # 이관: snapshot_actuals 이전에 만든 스냅샷은 생성 시각까지 들어온 실적으로 간주
+    'snapshot_backfill_actuals': """
+        INSERT OR IGNORE INTO snapshot_actuals (snapshot_id, actual_id, region_id, category_id,
+                                      new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, ts)
+        SELECT s.id, a.id, a.region_id, a.category_id, a.new_actual_4w, a.new_actual_close, a.cancel_actual_4w, a.cancel_actual_close, a.ts
+        FROM snapshots s JOIN actuals_data a ON a.ts <= s.created_at""",
+    'snapshot_active': """
+        SELECT id, label, period, checkpoint_at FROM snapshots
+        WHERE checkpoint_at <= ? AND checkpoint_at > ? ORDER BY checkpoint_at DESC, id DESC""",
+    'snapshot_get': "SELECT id, label, period, checkpoint_at FROM snapshots WHERE id = ?",
+    'snapshot_list': """
+        SELECT id, label, period, checkpoint_at, created_at, data_version,
+               (SELECT COUNT(*) FROM snapshot_rows WHERE snapshot_id = snapshots.id) AS row_count
+        FROM snapshots ORDER BY checkpoint_at DESC, id DESC""",
+    'snapshot_rows': """
+        SELECT region_id, category_id, new_target, cancel_target, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, ts
+        FROM snapshot_rows WHERE snapshot_id = ?""",
+    'snapshot_actuals': """
+        SELECT region_id, category_id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, ts
+        FROM snapshot_actuals WHERE snapshot_id = ? ORDER BY ts DESC, actual_id DESC""",
+    'snapshot_artifact': "SELECT content FROM snapshot_artifacts WHERE snapshot_id = ? AND name = ?",
+    'snapshot_artifact_save': "INSERT OR IGNORE INTO snapshot_artifacts (snapshot_id, name, content) VALUES (?, ?, ?)",
+    # 시뮬레이션: 지역 x 카테고리 x 월별 최신 실적 (트리거로 유지되는 월별 요약에서 읽음)
+    'simulation_history': """
+        SELECT region_id, category_id, period, ts, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close
+        FROM actuals_monthly""",
+    # 이관: 월별 요약이 생기기 전의 DB 는 실적 이력에서 한 번 채움 (MAX(ts) 와 같은 행의 값)
+    'simulation_backfill': """
+        INSERT OR IGNORE INTO actuals_monthly
+        SELECT region_id, category_id, strftime('%Y-%m', ts, 'unixepoch') AS period, MAX(ts), id,
+               new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close
+        FROM actuals_data GROUP BY region_id, category_id, period""",
+    # 키셋 페이지네이션: (ts, id) 가 직전 페이지 마지막 행보다 큰 행부터 limit 건
+    'history_page': """
+        SELECT ts, id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close FROM actuals_data
+        WHERE region_id = ? AND category_id = ? AND ts >= ? AND ts <= ? AND (ts, id) > (?, ?) ORDER BY ts, id LIMIT ?""",
+}
 
 # 1. 데이터베이스 셋업
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+def _migrate_metadata(c):
+    # 구버전 metadata (type, value) → id / 정렬순서 / 사용여부 컬럼 추가
+    cols = [r[1] for r in c.execute("PRAGMA table_info(metadata)")]
+    if 'sort_order' in cols: return
+    c.execute("ALTER TABLE metadata RENAME TO metadata_old")
+    c.execute('''CREATE TABLE metadata 
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, value TEXT NOT NULL, 
+                  sort_order INTEGER NOT NULL, active INTEGER NOT NULL DEFAULT 1, UNIQUE(type, value))''')
+    for dim_type, seed in DEFAULT_DIMENSIONS.items():
+        old = [r[0] for r in c.execute("SELECT value FROM metadata_old WHERE type=? ORDER BY rowid", (dim_type,))]
+        ordered = [v for v in seed if v in old] + [v for v in old if v not in seed]
+        # 기존에는 하드코딩 목록만 화면에 노출했으므로 목록 밖 값은 비활성으로 이관
+        c.executemany("INSERT INTO metadata (type, value, sort_order, active) VALUES (?, ?, ?, ?)",
+                      [(dim_type, v, i, int(v in seed)) for i, v in enumerate(ordered)])
+    c.execute("INSERT INTO metadata (type, value, sort_order) SELECT type, value, rowid FROM metadata_old WHERE type NOT IN ('region', 'category')")
+    c.execute("DROP TABLE metadata_old")
+
+def _register_dimension_sql(dim_type, expr):
+    # 처음 보는 지역/카테고리 값을 비활성 항목으로 metadata 에 등록 (이력 보존용)
+    # 트리거 안에서는 바깥 문장의 OR REPLACE 가 OR IGNORE 를 덮어쓰므로 충돌 절 대신 NOT EXISTS 로 거름
+    return f"""INSERT INTO metadata (type, value, sort_order, active)
+               SELECT '{dim_type}', {expr}, (SELECT IFNULL(MAX(sort_order), -1) + 1 FROM metadata WHERE type = '{dim_type}'), 0
+               WHERE NOT EXISTS (SELECT 1 FROM metadata WHERE type = '{dim_type}' AND value = {expr})"""
+
+def _migrate_compact_storage(c):
+    # 구버전 문자열 키 actuals/targets 테이블 → 정수 키(metadata.id) + epoch 초 테이블로 이관
+    legacy = {r[0] for r in c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('actuals', 'targets')")}
+    for table in sorted(legacy):
+        for dim_type, col in (('region', 'region'), ('category', 'category')):
+            for (value,) in c.execute(f"SELECT DISTINCT IFNULL({col}, '(미지정)') FROM {table}").fetchall():
+                c.execute(_register_dimension_sql(dim_type, ':value'), {"value": value})
+    if 'targets' in legacy:
+        c.execute("""INSERT OR REPLACE INTO targets_data (region_id, category_id, new_target, cancel_target)
+                     SELECT r.id, k.id, t.new_target, t.cancel_target FROM targets t
+                     JOIN metadata r ON r.type = 'region' AND r.value = IFNULL(t.region, '(미지정)')
+                     JOIN metadata k ON k.type = 'category' AND k.value = IFNULL(t.category, '(미지정)')""")
+        c.execute("DROP TABLE targets")
+    if 'actuals' in legacy:
+        c.execute("""INSERT INTO actuals_data (id, region_id, category_id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, ts)
+                     SELECT a.id, r.id, k.id, a.new_actual_4w, a.new_actual_close, a.cancel_actual_4w, a.cancel_actual_close,
+                            IFNULL(CAST(strftime('%s', a.timestamp) AS INTEGER), 0) FROM actuals a
+                     JOIN metadata r ON r.type = 'region' AND r.value = IFNULL(a.region, '(미지정)')
+                     JOIN metadata k ON k.type = 'category' AND k.value = IFNULL(a.category, '(미지정)')""")
+        c.execute("DROP TABLE actuals")
+
+def _create_schema(c):
     c.execute('''CREATE TABLE IF NOT EXISTS metadata 
-                 (type TEXT, value TEXT, PRIMARY KEY(type, value))''')
-    c.execute('''CREATE TABLE IF NOT EXISTS targets 
-                 (region TEXT, category TEXT, new_target REAL, cancel_target REAL, 
-                  PRIMARY KEY(region, category))''')
-    c.execute('''CREATE TABLE IF NOT EXISTS actuals 
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT, region TEXT, category TEXT, 
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, value TEXT NOT NULL, 
+                  sort_order INTEGER NOT NULL, active INTEGER NOT NULL DEFAULT 1, UNIQUE(type, value))''')
+    _migrate_metadata(c)
+    # 호환 뷰에서 이름(value)으로 거르는 조회가 metadata 를 풀스캔하지 않도록
+    c.execute("CREATE INDEX IF NOT EXISTS idx_metadata_value ON metadata (value)")
+
+    # 기초 데이터 채우기 (최초 1회: 해당 유형이 비어 있을 때만)
+    for dim_type, seed in DEFAULT_DIMENSIONS.items():
+        if c.execute("SELECT 1 FROM metadata WHERE type=? LIMIT 1", (dim_type,)).fetchone(): continue
+        c.executemany("INSERT INTO metadata (type, value, sort_order) VALUES (?, ?, ?)",
+                      [(dim_type, v, i) for i, v in enumerate(seed)])
+
+    # 실제 저장 테이블: 지역/카테고리는 metadata.id 정수 키, 시간은 epoch 초 정수
+    c.execute('''CREATE TABLE IF NOT EXISTS targets_data 
+                 (region_id INTEGER NOT NULL, category_id INTEGER NOT NULL, new_target REAL, cancel_target REAL, 
+                  PRIMARY KEY(region_id, category_id)) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS actuals_data 
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT, region_id INTEGER NOT NULL, category_id INTEGER NOT NULL, 
                   new_actual_4w REAL, new_actual_close REAL, cancel_actual_4w REAL, cancel_actual_close REAL, 
-                  timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''')
-    
-    # 기초 데이터 채우기 (최초 1회)
-    regions = ['중앙', '강북', '서대문', '고양', '의정부', '남양주', '강릉', '원주']
-    categories = ['출동보안', '고ARPU', '영상보안(SP)', '시스템 보안(SP)', '영상보안(KT/비대면)', '시스템 보안(SP+KT/비대면)']
-    for r in regions: c.execute("INSERT OR IGNORE INTO metadata VALUES ('region', ?)", (r,))
-    for cat in categories: c.execute("INSERT OR IGNORE INTO metadata VALUES ('category', ?)", (cat,))
-    
-    conn.commit()
-    conn.close()
+                  ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)))''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_actuals_dim_ts ON actuals_data (region_id, category_id, ts)")
+    _migrate_compact_storage(c)
+
+    # 호환 뷰: 기존 컬럼(region, category, timestamp)으로 조회/입력하는 쿼리와 엑셀 내보내기 유지
+    c.execute('''CREATE VIEW IF NOT EXISTS targets AS 
+                 SELECT r.value AS region, k.value AS category, t.new_target, t.cancel_target 
+                 FROM targets_data t JOIN metadata r ON r.id = t.region_id JOIN metadata k ON k.id = t.category_id''')
+    c.execute('''CREATE VIEW IF NOT EXISTS actuals AS 
+                 SELECT a.id, r.value AS region, k.value AS category, 
+                        a.new_actual_4w, a.new_actual_close, a.cancel_actual_4w, a.cancel_actual_close, 
+                        datetime(a.ts, 'unixepoch') AS timestamp 
+                 FROM actuals_data a JOIN metadata r ON r.id = a.region_id JOIN metadata k ON k.id = a.category_id''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS targets_view_insert INSTEAD OF INSERT ON targets
+                  BEGIN
+                    {_register_dimension_sql('region', 'NEW.region')};
+                    {_register_dimension_sql('category', 'NEW.category')};
+                    INSERT OR REPLACE INTO targets_data (region_id, category_id, new_target, cancel_target) VALUES (
+                      (SELECT id FROM metadata WHERE type = 'region' AND value = NEW.region),
+                      (SELECT id FROM metadata WHERE type = 'category' AND value = NEW.category),
+                      NEW.new_target, NEW.cancel_target);
+                  END''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS actuals_view_insert INSTEAD OF INSERT ON actuals
+                  BEGIN
+                    {_register_dimension_sql('region', 'NEW.region')};
+                    {_register_dimension_sql('category', 'NEW.category')};
+                    INSERT INTO actuals_data (id, region_id, category_id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, ts) VALUES (
+                      NEW.id,
+                      (SELECT id FROM metadata WHERE type = 'region' AND value = NEW.region),
+                      (SELECT id FROM metadata WHERE type = 'category' AND value = NEW.category),
+                      NEW.new_actual_4w, NEW.new_actual_close, NEW.cancel_actual_4w, NEW.cancel_actual_close,
+                      IFNULL(CAST(strftime('%s', NEW.timestamp) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)));
+                  END''')
+
+    # 월별 요약: 지역 x 카테고리 x 월(UTC)별 가장 최근 실적 1행 (시뮬레이션이 이력 전체를 훑지 않도록 트리거로 유지)
+    has_monthly = 'actuals_monthly' in dict(c.execute(SQL['migration_tables']).fetchall())
+    c.execute('''CREATE TABLE IF NOT EXISTS actuals_monthly 
+                 (region_id INTEGER NOT NULL, category_id INTEGER NOT NULL, period TEXT NOT NULL, ts INTEGER NOT NULL, id INTEGER NOT NULL, 
+                  new_actual_4w REAL, new_actual_close REAL, cancel_actual_4w REAL, cancel_actual_close REAL, 
+                  PRIMARY KEY(region_id, category_id, period)) WITHOUT ROWID''')
+    if not has_monthly: c.execute(SQL['simulation_backfill'])
+    c.execute('''CREATE TRIGGER IF NOT EXISTS monthly_actuals_insert AFTER INSERT ON actuals_data
+                 BEGIN
+                   INSERT INTO actuals_monthly VALUES (NEW.region_id, NEW.category_id, strftime('%Y-%m', NEW.ts, 'unixepoch'), NEW.ts, NEW.id, 
+                                                       NEW.new_actual_4w, NEW.new_actual_close, NEW.cancel_actual_4w, NEW.cancel_actual_close)
+                   ON CONFLICT(region_id, category_id, period) DO UPDATE SET 
+                     ts = excluded.ts, id = excluded.id, new_actual_4w = excluded.new_actual_4w, new_actual_close = excluded.new_actual_close, 
+                     cancel_actual_4w = excluded.cancel_actual_4w, cancel_actual_close = excluded.cancel_actual_close
+                   WHERE (excluded.ts, excluded.id) > (actuals_monthly.ts, actuals_monthly.id);
+                 END''')
+    # 수정/삭제는 드물므로 해당 칸/월만 이력에서 다시 계산
+    def refresh_month(row):
+        start = f"{row}.ts, 'unixepoch', 'start of month'"
+        return f'''DELETE FROM actuals_monthly WHERE region_id = {row}.region_id AND category_id = {row}.category_id 
+                     AND period = strftime('%Y-%m', {row}.ts, 'unixepoch');
+                   INSERT INTO actuals_monthly 
+                     SELECT region_id, category_id, strftime('%Y-%m', ts, 'unixepoch'), ts, id, 
+                            new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close 
+                     FROM actuals_data WHERE region_id = {row}.region_id AND category_id = {row}.category_id 
+                       AND ts >= CAST(strftime('%s', {start}) AS INTEGER) AND ts < CAST(strftime('%s', {start}, '+1 month') AS INTEGER) 
+                     ORDER BY ts DESC, id DESC LIMIT 1;'''
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS monthly_actuals_update AFTER UPDATE ON actuals_data
+                  BEGIN {refresh_month('OLD')} {refresh_month('NEW')} END''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS monthly_actuals_delete AFTER DELETE ON actuals_data
+                  BEGIN {refresh_month('OLD')} END''')
+
+    # 데이터 버전: 실적/목표/metadata 가 바뀔 때마다 트리거로 1씩 증가 (캐시 무효화 기준)
+    c.execute('''CREATE TABLE IF NOT EXISTS data_version 
+                 (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)''')
+    c.execute("INSERT OR IGNORE INTO data_version VALUES (1, 0)")
+    for table in ('actuals_data', 'targets_data', 'metadata'):
+        for op in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS bump_version_{table}_{op.lower()} AFTER {op} ON {table}
+                          BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END''')
+    # metadata 버전: metadata 가 바뀔 때만 증가 (레지스트리는 실적/목표 입력으로 다시 읽지 않음)
+    c.execute('''CREATE TABLE IF NOT EXISTS metadata_version 
+                 (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)''')
+    c.execute("INSERT OR IGNORE INTO metadata_version VALUES (1, 0)")
+    for op in ('INSERT', 'UPDATE', 'DELETE'):
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS bump_metadata_version_{op.lower()} AFTER {op} ON metadata
+                      BEGIN UPDATE metadata_version SET version = version + 1 WHERE id = 1; END''')
+    # 목표 버전: 목표/metadata 가 바뀔 때만 증가 (실적 입력으로는 목표 행렬을 다시 적재하지 않음)
+    c.execute('''CREATE TABLE IF NOT EXISTS targets_version 
+                 (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)''')
+    c.execute("INSERT OR IGNORE INTO targets_version VALUES (1, 0)")
+    for table in ('targets_data', 'metadata'):
+        for op in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS bump_targets_version_{table}_{op.lower()} AFTER {op} ON {table}
+                          BEGIN UPDATE targets_version SET version = version + 1 WHERE id = 1; END''')
+
+    # 마감 스냅샷: 체크포인트 시점의 최신 실적 + 목표를 고정 보관 (수정/삭제 불가), 미리 렌더링한 결과물 포함
+    tables = dict(c.execute(SQL['migration_tables']).fetchall())
+    backfill = 'snapshots' in tables and 'snapshot_actuals' not in tables
+    if _artifacts_without_rowid(c):
+        # 이전 WITHOUT ROWID 결과물 표는 이름을 바꿔 두고 아래에서 새 표로 옮김 (수정/삭제 금지 트리거는 옛 표와 함께 삭제)
+        c.execute("ALTER TABLE snapshot_artifacts RENAME TO snapshot_artifacts_old")
+    c.execute('''CREATE TABLE IF NOT EXISTS snapshots 
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT, label TEXT NOT NULL, period TEXT NOT NULL, 
+                  checkpoint_at INTEGER NOT NULL, created_at INTEGER NOT NULL, data_version INTEGER NOT NULL, UNIQUE(label, period))''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_checkpoint ON snapshots (checkpoint_at)")
+    c.execute('''CREATE TABLE IF NOT EXISTS snapshot_rows 
+                 (snapshot_id INTEGER NOT NULL, region_id INTEGER NOT NULL, category_id INTEGER NOT NULL, 
+                  new_target REAL, cancel_target REAL, new_actual_4w REAL, new_actual_close REAL, cancel_actual_4w REAL, cancel_actual_close REAL, 
+                  ts INTEGER, PRIMARY KEY(snapshot_id, region_id, category_id)) WITHOUT ROWID''')
+    # 결과물은 수십 MB 짜리 blob 이므로 일반(rowid) 표: WITHOUT ROWID 는 큰 행을 키 B-tree 에 넣어 읽기/쓰기마다 큰 셀을 옮김
+    c.execute('''CREATE TABLE IF NOT EXISTS snapshot_artifacts 
+                 (snapshot_id INTEGER NOT NULL, name TEXT NOT NULL, content BLOB NOT NULL, PRIMARY KEY(snapshot_id, name))''')
+    if c.execute("SELECT 1 FROM sqlite_master WHERE name = 'snapshot_artifacts_old'").fetchone():
+        c.execute("INSERT INTO snapshot_artifacts (snapshot_id, name, content) SELECT snapshot_id, name, content FROM snapshot_artifacts_old")
+        c.execute("DROP TABLE snapshot_artifacts_old")
+    # 내보내기용 실적 이력 사본: 실시간 actuals_data 가 나중에 수정/삭제되어도 스냅샷 결과는 그대로
+    c.execute('''CREATE TABLE IF NOT EXISTS snapshot_actuals 
+                 (snapshot_id INTEGER NOT NULL, actual_id INTEGER NOT NULL, region_id INTEGER NOT NULL, category_id INTEGER NOT NULL, 
+                  new_actual_4w REAL, new_actual_close REAL, cancel_actual_4w REAL, cancel_actual_close REAL, 
+                  ts INTEGER NOT NULL, PRIMARY KEY(snapshot_id, actual_id)) WITHOUT ROWID''')
+    if backfill: c.execute(SQL['snapshot_backfill_actuals'])
+    for table in ('snapshots', 'snapshot_rows', 'snapshot_artifacts', 'snapshot_actuals'):
+        for op in ('UPDATE', 'DELETE'):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS freeze_{table}_{op.lower()} BEFORE {op} ON {table}
+                          BEGIN SELECT RAISE(ABORT, '마감 스냅샷은 수정/삭제할 수 없습니다'); END''')
+
+def init_db(db_name=DB_NAME):
+    # 스키마 생성과 구버전 이관을 하나의 명시적 트랜잭션으로 실행
+    # (ALTER/DROP 중간에 실패해도 metadata_old 같은 반쯤 이관된 상태를 남기지 않고 되돌림)
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    try:
+        # 스키마 이관 전에는 항상 백업
+        if _needs_migration(conn): backup_database(db_name, reason='premigration')
+        conn.execute("BEGIN")
+        _create_schema(conn.cursor())
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction: conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+# 온라인 백업: SQLite backup API 로 페이지 단위 복사 (단계 사이에 잠금을 풀어 쓰기 요청이 계속 진행)
+class BackupRestarted(Exception):
+    pass
+
+def _artifacts_without_rowid(conn):
+    row = conn.execute(SQL['migration_without_rowid'], ('snapshot_artifacts',)).fetchone()
+    return bool(row and row[0])
+
+def _needs_migration(conn):
+    tables = dict(conn.execute(SQL['migration_tables']).fetchall())
+    if tables.get('actuals') == 'table' or tables.get('targets') == 'table': return True
+    if 'snapshots' in tables and 'snapshot_actuals' not in tables: return True
+    if _artifacts_without_rowid(conn): return True
+    if 'actuals_data' in tables and 'actuals_monthly' not in tables: return True
+    return 'metadata' in tables and 'sort_order' not in [r[0] for r in conn.execute(SQL['migration_columns'], ('metadata',))]
+
+def backup_database(db_name=None, backup_dir=None, reason='scheduled'):
+    db_name = db_name or DB_NAME
+    backup_dir = backup_dir or BACKUP_DIR
+    os.makedirs(backup_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(db_name))[0]
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    tmp_path = os.path.join(backup_dir, f".{base}_{stamp}.tmp")
+    dest = os.path.join(backup_dir, f"{base}_{stamp}_{reason}.db.gz")
+
+    progress = {'steps': 0, 'restarts': 0, 'remaining': None}
+    def on_progress(status, remaining, total):
+        # 복사 중 다른 연결이 원본을 수정하면 SQLite 가 처음부터 다시 복사함 → 재시작 횟수 제한
+        if progress['remaining'] is not None and remaining > progress['remaining']:
+            progress['restarts'] += 1
+            if progress['restarts'] > BACKUP_MAX_RESTARTS: raise BackupRestarted()
+        progress['steps'] += 1
+        progress['remaining'] = remaining
+        time.sleep(BACKUP_STEP_SLEEP)
+
+    started = time.perf_counter()
+    src = sqlite3.connect(db_name, timeout=30)
+    dst = sqlite3.connect(tmp_path)
+    try:
+        try:
+            src.backup(dst, pages=BACKUP_PAGES_PER_STEP, progress=on_progress)
+        except BackupRestarted:
+            # 쓰기가 계속 몰리면 한 번에 복사 (읽기 잠금을 복사 시간 동안만 유지)
+            src.backup(dst, pages=-1)
+        page_count = dst.execute("PRAGMA page_count").fetchone()[0]
+        page_size = dst.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    copied = time.perf_counter() - started
+
+    with open(tmp_path, 'rb') as f_in, gzip.open(dest, 'wb', compresslevel=6) as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(tmp_path)
+    rotate_backups(backup_dir, base)
+
+    elapsed = time.perf_counter() - started
+    size = page_count * page_size
+    return {"file": dest, "bytes": size, "compressed_bytes": os.path.getsize(dest), "steps": progress['steps'],
+            "restarts": progress['restarts'], "copy_seconds": round(copied, 3), "seconds": round(elapsed, 3),
+            "mb_per_second": round(size / 1e6 / copied, 1) if copied else None}
+
+def list_backups(backup_dir=None, base=None):
+    backup_dir = backup_dir or BACKUP_DIR
+    base = base or os.path.splitext(os.path.basename(DB_NAME))[0]
+    if not os.path.isdir(backup_dir): return []
+    # 조직 ID 에 '_' 가 들어갈 수 있으므로 접두어가 아니라 파일명 전체 형식으로 비교 (조직 a 가 a_b 의 백업을 가져가지 않게)
+    pattern = re.compile(rf'^{re.escape(base)}_\d{{8}}_\d{{6}}_\d{{6}}_[a-z]+\.db\.gz$')
+    return sorted((n for n in os.listdir(backup_dir) if pattern.match(n)), reverse=True)
+
+def rotate_backups(backup_dir, base):
+    # 가장 최근 BACKUP_KEEP 개만 보관
+    for name in list_backups(backup_dir, base)[BACKUP_KEEP:]:
+        os.remove(os.path.join(backup_dir, name))
+
+def restore_backup(backup_path, target_path):
+    # 백업을 새 파일로 복원 (운영 중인 DB 를 덮어쓰지 않도록 기존 파일이 있으면 거부)
+    if os.path.exists(target_path): raise FileExistsError(target_path)
+    tmp_path = target_path + '.restoring'
+    with gzip.open(backup_path, 'rb') as f_in, open(tmp_path, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+    if result != 'ok':
+        os.remove(tmp_path)
+        raise sqlite3.DatabaseError(f"백업 파일 무결성 검사 실패: {result}")
+    os.replace(tmp_path, target_path)
+    return target_path
+
+def tenant_db_files():
+    if not os.path.isdir(TENANT_DIR): return []
+    return sorted(os.path.join(TENANT_DIR, n) for n in os.listdir(TENANT_DIR) if n.endswith('.db'))
+
+def start_backup_scheduler(db_name=None):
+    if not BACKUP_INTERVAL_HOURS: return None
+    def run():
+        while True:
+            time.sleep(BACKUP_INTERVAL_HOURS * 3600)
+            # 기본 DB 와 조직별 DB 를 차례로 백업 (한 조직 실패가 다른 조직 백업을 막지 않음)
+            for path in [db_name or DB_NAME] + tenant_db_files():
+                try:
+                    app.logger.info("backup: %s", backup_database(path))
+                except Exception:
+                    app.logger.exception("scheduled backup failed: %s", path)
+    thread = threading.Thread(target=run, daemon=True, name='backup-scheduler')
+    thread.start()
+    return thread
+
+_schedulers_started = False
+_schedulers_lock = threading.Lock()
+
+def start_schedulers():
+    # 프로세스당 한 번만 시작, 디버그 리로더의 감시 프로세스(WERKZEUG_RUN_MAIN 없음)는 제외
+    global _schedulers_started
+    if not SCHEDULERS_ENABLED or _schedulers_started: return
+    if app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true': return
+    with _schedulers_lock:
+        if _schedulers_started: return
+        _schedulers_started = True
+    start_backup_scheduler()
+    start_snapshot_scheduler()
+
+@app.before_request
+def ensure_schedulers():
+    # WSGI 서버(gunicorn 등)로 import 된 경우에도 첫 요청에서 스케줄러 시작
+    start_schedulers()
 
 init_db()
 
+def get_data_version(conn):
+    row = conn.execute(SQL['data_version']).fetchone()
+    return row[0] if row else 0
+
+def get_metadata_version(conn):
+    row = conn.execute(SQL['metadata_version']).fetchone()
+    return row[0] if row else 0
+
+def get_targets_version(conn):
+    row = conn.execute(SQL['targets_version']).fetchone()
+    return row[0] if row else 0
+
+# 지역/카테고리 레지스트리: metadata 를 한 번 읽어 이름→순위, 이름→id 를 dict 로 보관 (O(1) 조회)
+class DimensionRegistry:
+    def __init__(self, version, rows):
+        self.version = version
+        self.ids, self.ranks, self.active = {}, {}, {}
+        for dim_id, dim_type, value, sort_order, active in rows:
+            self.ids.setdefault(dim_type, {})[value] = dim_id
+            ranks = self.ranks.setdefault(dim_type, {})
+            ranks[value] = len(ranks)
+            if active: self.active.setdefault(dim_type, {})[value] = dim_id
+
+    def names(self, dim_type):
+        # 활성 항목만 정렬 순서대로 (UI/업로드 양식용)
+        return list(self.active.get(dim_type, {}))
+
+    def all_names(self, dim_type):
+        # 비활성 포함 전체 (과거 이력 정렬/표시용)
+        return list(self.ranks.get(dim_type, {}))
+
+    def rank(self, dim_type, value):
+        ranks = self.ranks.get(dim_type, {})
+        return ranks.get(value, len(ranks))
+
+    def id_of(self, dim_type, value):
+        return self.ids.get(dim_type, {}).get(value)
+
+    def is_active(self, dim_type, value):
+        return value in self.active.get(dim_type, {})
+
+_registry_cache = {}
+_registry_lock = threading.Lock()
+
+def _db_path(conn=None, db_name=None):
+    # 프로세스 내 캐시 키: 같은 DB 를 상대/절대 경로로 열어도 하나로 취급 (연결 없으면 현재 조직 DB)
+    if db_name is None:
+        db_name = conn.execute("PRAGMA database_list").fetchone()[2] if conn is not None else current_db()
+    return os.path.abspath(db_name)
+
+def get_registry(conn=None, db_name=None):
+    # metadata 버전이 바뀐 경우에만 metadata 를 다시 읽음
+    db_name = _db_path(conn, db_name)
+    own = conn is None
+    if own: conn = sqlite3.connect(db_name)
+    try:
+        version = get_metadata_version(conn)
+        with _registry_lock:
+            cached = _registry_cache.get(db_name)
+        if cached and cached.version == version: return cached
+        rows = conn.execute(SQL['registry']).fetchall()
+    finally:
+        if own: conn.close()
+    registry = DimensionRegistry(version, rows)
+    with _registry_lock:
+        _registry_cache[db_name] = registry
+    return registry
+
+def invalid_dimensions(registry, region, category):
+    errors = []
+    if not registry.is_active('region', region): errors.append(f"알 수 없는 지역: {region}")
+    if not registry.is_active('category', category): errors.append(f"알 수 없는 카테고리: {category}")
+    return errors
+
+# 목표 행렬: 지역 x 카테고리 목표를 정렬 순위(코드) 기준 NumPy 배열로 보관
+# 배열은 읽기 전용이고, 목표 저장 시에는 복사본을 고쳐 통째로 교체 (copy-on-write)
+class TargetsMatrix:
+    def __init__(self, version, registry, rows):
+        self.version = version
+        self.registry = registry
+        shape = (len(registry.ranks.get('region', {})), len(registry.ranks.get('category', {})))
+        self.new = np.zeros(shape, dtype=np.float64)
+        self.cancel = np.zeros(shape, dtype=np.float64)
+        self.present = np.zeros(shape, dtype=bool)
+        # metadata.id → 코드 룩업 배열
+        self.lookup = {}
+        for dim_type, ids in registry.ids.items():
+            lookup = np.zeros(max(ids.values()) + 1, dtype=np.int16)
+            for name, dim_id in ids.items(): lookup[dim_id] = registry.rank(dim_type, name)
+            self.lookup[dim_type] = lookup
+        self._assign(rows)
+
+    def _assign(self, rows):
+        rows = list(rows)
+        if rows:
+            region_ids, category_ids, new, cancel = zip(*rows)
+            r, c = self.codes_of_ids('region', region_ids), self.codes_of_ids('category', category_ids)
+            self.new[r, c] = np.array(new, dtype=np.float64)
+            self.cancel[r, c] = np.array(cancel, dtype=np.float64)
+            self.present[r, c] = True
+        np.nan_to_num(self.new, copy=False)
+        np.nan_to_num(self.cancel, copy=False)
+        self.net = self.new - self.cancel
+        for array in (self.new, self.cancel, self.net, self.present): array.setflags(write=False)
+
+    def updated(self, version, rows):
+        # 바뀐 칸만 반영한 새 행렬 (기존 행렬을 읽는 요청에는 영향 없음)
+        matrix = object.__new__(TargetsMatrix)
+        matrix.version, matrix.registry, matrix.lookup = version, self.registry, self.lookup
+        matrix.new, matrix.cancel, matrix.present = self.new.copy(), self.cancel.copy(), self.present.copy()
+        matrix._assign(rows)
+        return matrix
+
+    def codes_of_ids(self, dim_type, ids):
+        return self.lookup[dim_type][np.asarray(ids, dtype=np.int64)]
+
+    def codes_of_names(self, dim_type, names):
+        ranks = self.registry.ranks.get(dim_type, {})
+        return np.fromiter((ranks.get(n, -1) for n in names), dtype=np.int64, count=len(names))
+
+    def target(self, region, category):
+        r, c = self.registry.rank('region', region), self.registry.rank('category', category)
+        if r >= self.new.shape[0] or c >= self.new.shape[1]: return {"new_target": 0, "cancel_target": 0}
+        return {"new_target": float(self.new[r, c]), "cancel_target": float(self.cancel[r, c])}
+
+    def lookup_targets(self, region_codes, category_codes):
+        # 행 단위 (신규, 해지) 목표 배열, 코드가 없거나(-1) 목표 미설정이면 0
+        valid = (region_codes >= 0) & (category_codes >= 0)
+        r, c = np.where(valid, region_codes, 0), np.where(valid, category_codes, 0)
+        return np.where(valid, self.new[r, c], 0.0), np.where(valid, self.cancel[r, c], 0.0)
+
+    def dashboard(self, category, net_actual_close):
+        # net_actual_close: region_id → 최신 순증 마감 실적, 목표가 설정된 지역만 정렬 순서대로
+        c = self.registry.rank('category', category)
+        regions = self.registry.all_names('region')
+        codes = np.flatnonzero(self.present[:, c])
+        actual = np.array([net_actual_close.get(self.registry.id_of('region', regions[r])) for r in codes.tolist()], dtype=np.float64)
+        target = self.net[codes, c]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(target != 0, np.round(actual / target * 100, 1), 0.0)
+        return [{"region": regions[r], "net_target": t, "net_actual_close": None if a != a else a,
+                 "achievement_rate": None if a != a else k}
+                for r, t, a, k in zip(codes.tolist(), target.tolist(), actual.tolist(), rate.tolist())]
+
+_targets_cache = {}
+_targets_lock = threading.Lock()
+
+def get_targets_matrix(conn=None, db_name=None):
+    # 목표 버전(목표/metadata 변경 시에만 증가)이 바뀐 경우에만 targets_data 를 다시 적재
+    db_name = _db_path(conn, db_name)
+    own = conn is None
+    if own: conn = sqlite3.connect(db_name)
+    try:
+        version = get_targets_version(conn)
+        with _targets_lock:
+            cached = _targets_cache.get(db_name)
+        if cached and cached.version == version: return cached
+        registry = get_registry(conn, db_name)
+        rows = conn.execute(SQL['targets']).fetchall()
+    finally:
+        if own: conn.close()
+    matrix = TargetsMatrix(version, registry, rows)
+    with _targets_lock:
+        _targets_cache[db_name] = matrix
+    return matrix
+
+def publish_targets(db_name, base_version, version, rows):
+    # 목표 저장 트랜잭션 직후 호출: 캐시가 쓰기 직전 버전이면 바뀐 칸만 고친 복사본으로 교체
+    with _targets_lock:
+        cached = _targets_cache.get(db_name)
+        if cached and cached.version == base_version:
+            _targets_cache[db_name] = cached.updated(version, rows)
+
+class StaleData(Exception):
+    def __init__(self, expected, actual):
+        super().__init__(f"data_version {expected} → {actual}")
+        self.expected = expected
+        self.actual = actual
+
+def save_targets(conn, rows, expected_version=None):
+    # rows: (region_id, category_id, new_target, cancel_target), 쓰기 잠금을 먼저 잡아 전후 버전 사이에 다른 쓰기가 끼지 않게 함
+    # expected_version: 이 버전 기준으로 계산한 목표일 때만 저장 (그 사이 바뀌었으면 StaleData)
+    conn.execute("BEGIN IMMEDIATE")
+    if expected_version is not None:
+        data_version = get_data_version(conn)
+        if data_version != expected_version:
+            conn.rollback()
+            raise StaleData(expected_version, data_version)
+    base_version = get_targets_version(conn)
+    conn.executemany(SQL['save_target'], rows)
+    version = get_targets_version(conn)
+    conn.commit()
+    publish_targets(_db_path(conn), base_version, version, rows)
+
+# 읽기 전용 인메모리 복제본: 대시보드/목표/메타데이터 조회를 디스크 DB 잠금과 분리
+class ReplicaSnapshot:
+    def __init__(self, version, registry, targets, latest, last_id):
+        self.version = version
+        self.registry = registry
+        self.targets = targets      # TargetsMatrix
+        self.latest = latest        # (region_id, category_id) → (ts, id, new_4w, new_close, cancel_4w, cancel_close)
+        self.last_id = last_id
+
+    def target(self, region, category):
+        return self.targets.target(region, category)
+
+    def dashboard(self, category):
+        category_id = self.registry.id_of('category', category)
+        return self.targets.dashboard(category, {r: (row[3] or 0) - (row[5] or 0)
+                                                 for (r, c), row in self.latest.items() if c == category_id})
+
+class ReadReplica:
+    def __init__(self, db_name, interval):
+        self.db_name = db_name
+        self.interval = interval
+        self.snapshot = None
+        self._wake = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._stopped = False
+        self.refresh()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped: return
+            try:
+                self.refresh()
+            except sqlite3.Error:
+                pass  # 쓰기 폭주로 잠긴 경우 다음 주기에 재시도
+
+    def notify(self):
+        # 이 프로세스에서 커밋한 직후 주기를 기다리지 않고 갱신
+        self._wake.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def refresh(self):
+        with self._refresh_lock:
+            conn = sqlite3.connect(self.db_name)
+            try:
+                conn.execute("BEGIN")
+                version = get_data_version(conn)
+                old = self.snapshot
+                if old is not None and old.version == version: return
+                registry = get_registry(conn, self.db_name)
+                targets = get_targets_matrix(conn, self.db_name)
+                last_id = conn.execute(SQL['replica_last_id']).fetchone()[0]
+                if old is None or last_id < old.last_id:
+                    latest = {(r, c): row for r, c, *row in conn.execute(SQL['replica_latest'])}
+                else:
+                    # actuals 는 추가만 되는 이력이므로 마지막으로 본 id 이후 행만 반영
+                    latest = dict(old.latest)
+                    for r, c, *row in conn.execute(SQL['replica_since'], (old.last_id,)):
+                        current = latest.get((r, c))
+                        if current is None or tuple(row[:2]) > tuple(current[:2]): latest[(r, c)] = tuple(row)
+            finally:
+                conn.close()
+            self.snapshot = ReplicaSnapshot(version, registry, targets, latest, last_id)
+
+def get_replica():
+    # 복제본은 조직별로 하나 (조직이 캐시에서 정리되면 함께 중지)
+    if not READ_REPLICA: return None
+    return current_tenant().get_replica()
+
+def notify_replica():
+    replica = current_tenant().replica
+    if replica is not None: replica.notify()
+
+# 조직(테넌트)별 DB 라우팅
+_TENANT_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+_TENANT_PREFIX = re.compile(r'^/t/([A-Za-z0-9_-]{1,64})(?=/|$)')
+
+class UnknownTenant(Exception):
+    pass
+
+def tenant_db_path(tenant_id):
+    if tenant_id is None: return os.path.abspath(DB_NAME)
+    if not _TENANT_ID.match(tenant_id): raise ValueError(tenant_id)
+    return os.path.abspath(os.path.join(TENANT_DIR, f"{tenant_id}.db"))
+
+class TenantPrefixMiddleware:
+    # /t/<조직ID>/api/... → 조직ID 를 environ 에 싣고 나머지 경로로 라우팅 (화면의 URL 은 script_root 기준)
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        match = _TENANT_PREFIX.match(path)
+        if match:
+            environ['sales.tenant'] = match.group(1)
+            environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + match.group(0)
+            environ['PATH_INFO'] = path[match.end():] or '/'
+        return self.wsgi_app(environ, start_response)
+
+app.wsgi_app = TenantPrefixMiddleware(app.wsgi_app)
+
+class PooledConnection(sqlite3.Connection):
+    # close() 시 실제로 닫지 않고 조직 연결 풀에 반납
+    tenant = None
+
+    def close(self):
+        if self.tenant is None: return super().close()
+        self.tenant.release(self)
+
+class Tenant:
+    def __init__(self, tenant_id, db_path):
+        self.id = tenant_id
+        self.db_path = db_path
+        self.last_used = time.monotonic()
+        self.replica = None
+        self.closed = False
+        self._idle = []
+        self._lock = threading.Lock()
+        # 무거운 요청 수용 제어/요청 합치기도 조직별 (한 조직의 폭주가 다른 조직을 429 로 막지 않도록)
+        self.admission = {}
+        self.singleflight = SingleFlight()
+
+    def connect(self):
+        with self._lock:
+            self.last_used = time.monotonic()
+            if self._idle: return self._idle.pop()
+        conn = sqlite3.connect(self.db_path, factory=PooledConnection, check_same_thread=False)
+        conn.tenant = self
+        return conn
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction: conn.rollback()
+        except sqlite3.Error:
+            sqlite3.Connection.close(conn)
+            return
+        with self._lock:
+            if not self.closed and len(self._idle) < TENANT_POOL_SIZE:
+                self._idle.append(conn)
+                return
+        sqlite3.Connection.close(conn)
+
+    def get_admission(self, name):
+        with self._lock:
+            if name not in self.admission: self.admission[name] = AdmissionController(name, *ADMISSION_LIMITS[name])
+            return self.admission[name]
+
+    def get_replica(self):
+        with self._lock:
+            if self.replica is None and not self.closed:
+                self.replica = ReadReplica(self.db_path, REPLICA_REFRESH_SECONDS)
+            return self.replica
+
+    def close(self):
+        # 캐시에서 밀려날 때: 유휴 연결 닫기, 복제본 중지, 조직별 캐시 비우기 (사용 중인 연결은 반납 시 닫힘)
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            replica, self.replica = self.replica, None
+        for conn in idle: sqlite3.Connection.close(conn)
+        if replica is not None: replica.stop()
+        for cache, lock in ((_registry_cache, _registry_lock), (_targets_cache, _targets_lock), (_pack_cache, _pack_lock),
+                            (_active_snapshots, _snapshot_lock), (_simulation_cache, _simulation_lock)):
+            with lock:
+                cache.pop(self.db_path, None)
+        drop_snapshot_artifacts(self.db_path)
+
+_migrated = {os.path.abspath(DB_NAME)}
+_migrate_locks = {}
+
+def ensure_schema(db_path):
+    # 조직 DB 는 처음 접근할 때 한 번만 스키마 생성/이관 (조직마다 별도 잠금)
+    if db_path in _migrated: return
+    with _tenants_lock:
+        lock = _migrate_locks.setdefault(db_path, threading.Lock())
+    with lock:
+        if db_path in _migrated: return
+        if not os.path.exists(db_path):
+            if not TENANT_AUTO_CREATE: raise UnknownTenant(db_path)
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        init_db(db_path)
+        _migrated.add(db_path)
+
+class TenantCache:
+    # 최근 사용 순서(LRU)로 조직을 보관, 크기 초과/유휴 시간 초과 조직은 정리
+    def __init__(self, capacity, idle_seconds):
+        self.capacity = capacity
+        self.idle_seconds = idle_seconds
+        self._tenants = OrderedDict()
+
+    def get(self, tenant_id):
+        now = time.monotonic()
+        with _tenants_lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is not None:
+                self._tenants.move_to_end(tenant_id)
+                tenant.last_used = now
+        if tenant is None:
+            db_path = tenant_db_path(tenant_id)
+            ensure_schema(db_path)
+            with _tenants_lock:
+                tenant = self._tenants.get(tenant_id)
+                if tenant is None: tenant = self._tenants[tenant_id] = Tenant(tenant_id, db_path)
+                self._tenants.move_to_end(tenant_id)
+        for evicted in self._evict(now):
+            evicted.close()
+        return tenant
+
+    def _evict(self, now):
+        evicted = []
+        with _tenants_lock:
+            while len(self._tenants) > self.capacity:
+                evicted.append(self._tenants.popitem(last=False)[1])
+            # 가장 오래 안 쓴 조직부터 유휴 시간 확인
+            while self._tenants:
+                tenant = next(iter(self._tenants.values()))
+                if now - tenant.last_used < self.idle_seconds: break
+                evicted.append(self._tenants.popitem(last=False)[1])
+        return evicted
+
+    def stats(self):
+        now = time.monotonic()
+        with _tenants_lock:
+            return [{"tenant": t.id, "db": t.db_path, "idle_seconds": round(now - t.last_used, 1),
+                     "pooled_connections": len(t._idle), "replica": t.replica is not None}
+                    for t in self._tenants.values()]
+
+_tenants = None
+_tenants_lock = threading.Lock()
+
+def get_tenants():
+    global _tenants
+    with _tenants_lock:
+        if _tenants is None: _tenants = TenantCache(TENANT_CACHE_SIZE, TENANT_IDLE_SECONDS)
+    return _tenants
+
+@app.before_request
+def bind_tenant():
+    tenant_id = request.environ.get('sales.tenant') or request.headers.get(TENANT_HEADER) or None
+    try:
+        g.tenant = get_tenants().get(tenant_id)
+    except ValueError:
+        return jsonify({"msg": f"조직 ID 형식이 올바르지 않습니다: {tenant_id}"}), 400
+    except UnknownTenant:
+        return jsonify({"msg": f"등록되지 않은 조직입니다: {tenant_id}"}), 404
+
+def current_tenant():
+    if has_request_context() and 'tenant' in g: return g.tenant
+    return get_tenants().get(None)
+
+def current_db():
+    if has_request_context() and 'tenant' in g: return g.tenant.db_path
+    return os.path.abspath(DB_NAME)
+
+def db_connect():
+    # 요청 중이면 해당 조직의 연결 풀에서, 아니면 기본 DB 로 연결
+    if has_request_context() and 'tenant' in g: return g.tenant.connect()
+    return sqlite3.connect(DB_NAME)
+
+# 무거운 요청(엑셀 내보내기/업로드/회의자료 생성) 수용 제어
+class Overloaded(Exception):
+    def __init__(self, name, retry_after):
+        super().__init__(name)
+        self.name = name
+        self.retry_after = retry_after
+
+class AdmissionController:
+    # 동시 실행 limit 건 + 대기열 queue 건까지만 받고, 나머지는 즉시 429
+    def __init__(self, name, limit, queue, wait_seconds):
+        self.name, self.limit, self.queue, self.wait_seconds = name, limit, queue, wait_seconds
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.running = self.waiting = 0
+        self.admitted = self.rejected = self.coalesced = 0
+        self.avg_seconds = 1.0
+
+    def retry_after(self):
+        # 평균 처리 시간 x 앞선 작업 수 / 동시 실행 수 로 재시도 시점 추정
+        return max(1, int(self.avg_seconds * (self.running + self.waiting + 1) / self.limit + 0.5))
+
+    @contextlib.contextmanager
+    def slot(self):
+        with self._lock:
+            if self.running + self.waiting >= self.limit + self.queue:
+                self.rejected += 1
+                raise Overloaded(self.name, self.retry_after())
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.wait_seconds)
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.rejected += 1
+                raise Overloaded(self.name, self.retry_after())
+            self.running += 1
+            self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.perf_counter() - started)
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {"limit": self.limit, "queue": self.queue, "running": self.running, "waiting": self.waiting,
+                    "admitted": self.admitted, "rejected": self.rejected, "coalesced": self.coalesced,
+                    "avg_seconds": round(self.avg_seconds, 3)}
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = self.error = None
+
+class SingleFlight:
+    # 같은 key 로 동시에 들어온 요청은 첫 요청의 결과를 함께 사용
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader: flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None: raise flight.error
+            return flight.result, True
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+def get_admission(name):
+    # 현재 조직의 엔드포인트별 수용 제어
+    return current_tenant().get_admission(name)
+
+def run_heavy(name, fn, key=None):
+    # 동일 요청은 하나의 빌드로 합치고(singleflight), 실제로 빌드하는 요청에만 동시 실행 한도 적용 (둘 다 현재 조직 단위)
+    tenant = current_tenant()
+    controller = tenant.get_admission(name)
+    def admitted():
+        with controller.slot(): return fn()
+    if key is None: return admitted()
+    result, shared = tenant.singleflight.do((name,) + tuple(key), admitted)
+    if shared:
+        with controller._lock: controller.coalesced += 1
+    return result
+
+def admission_limited(name):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            return run_heavy(name, lambda: view(*args, **kwargs))
+        return wrapper
+    return decorator
+
+@app.errorhandler(Overloaded)
+def handle_overloaded(e):
+    return jsonify({"msg": "요청이 많아 잠시 후 다시 시도해 주세요.", "endpoint": e.name, "retry_after": e.retry_after}), 429, {"Retry-After": str(e.retry_after)}
+
+@app.route('/api/admission', methods=['GET'])
+def get_admission_stats():
+    return jsonify({name: get_admission(name).stats() for name in ADMISSION_LIMITS})
+
 # 콤마 제거 및 숫자로 변환하는 유틸리티 함수
 def clean_num(val):
     if not val: return 0
@@ -399,6 +1449,7 @@ HTML_PAGE = r"""
             <select id="dash_category" onchange="loadDashboard()" style="text-align: left; max-width: 300px;">
                 <!-- Dynamically filled -->
             </select>
+            <span id="snapshot_badge" style="display: none; margin-left: 8px; font-size: 0.8rem; font-weight: 600; color: var(--primary);"></span>
         </div>
 
         <div class="metrics-grid">
@@ -425,9 +1476,22 @@ HTML_PAGE = r"""
             </div>
         </div>
 
+        <div class="form-group" style="margin-top: 1.5rem;">
+            <label class="label-text">지역별 추이 (순증 마감 전망)</label>
+            <select id="hist_region" onchange="loadHistory()" style="text-align: left; max-width: 300px;">
+                <!-- Dynamically filled -->
+            </select>
+        </div>
+        <div class="chart-container">
+            <canvas id="historyChart"></canvas>
+        </div>
+
         <button type="button" class="btn btn-secondary" onclick="exportData()">
             📥 양식 동기화 엑셀(XLSX) 다운로드
         </button>
+        <button type="button" class="btn btn-secondary" onclick="exportPack()">
+            📚 마감회의 자료 팩(카테고리별/지역별/합계) 다운로드
+        </button>
     </div>
 
     <!-- 3. Admin Side -->
@@ -460,7 +1524,7 @@ HTML_PAGE = r"""
                     <p style="font-size: 0.75rem; color: var(--slate-700); margin-top: 0.5rem;">목표 데이터(targets) 또는 실적 데이터(actuals) 벌크 업데이트</p>
                 </div>
                 <div style="margin-top: 1rem; text-align: center;">
-                    <a href="/api/download_example_target" style="font-size: 0.8rem; color: var(--primary); text-decoration: none; font-weight: 600;">📥 [예시] 목표 업로드 양식 다운로드</a>
+                    <a href="{{ request.script_root }}/api/download_example_target" style="font-size: 0.8rem; color: var(--primary); text-decoration: none; font-weight: 600;">📥 [예시] 목표 업로드 양식 다운로드</a>
                 </div>
                 <input type="file" id="excelFile" style="display: none;" onchange="handleFileUpload(this)">
             </div>
@@ -486,9 +1550,10 @@ HTML_PAGE = r"""
     let categories = [];
     let mainChart = null;
     let mainPie = null;
+    let historyChart = null;
 
     window.onload = () => {
-        fetch('/api/metadata')
+        fetch('{{ request.script_root }}/api/metadata')
             .then(res => res.json())
             .then(data => {
                 regions = data.regions;
@@ -507,6 +1572,7 @@ HTML_PAGE = r"""
         
         const dashCat = document.getElementById('dash_category');
         dashCat.innerHTML = categories.map(c => `<option value="${c}">${c}</option>`).join('');
+        document.getElementById('hist_region').innerHTML = regions.map(r => `<option value="${r}">${r}</option>`).join('');
     }
 
     function renderRadios(containerId, name, items, onchange) {
@@ -621,7 +1687,7 @@ HTML_PAGE = r"""
     function fetchTarget() {
         const r = document.querySelector('input[name="region"]:checked').value;
         const c = document.querySelector('input[name="category"]:checked').value;
-        fetch(`/api/get_target?region=${r}&category=${c}`)
+        fetch(`{{ request.script_root }}/api/get_target?region=${r}&category=${c}`)
             .then(res => res.json())
             .then(data => {
                 document.getElementById('disp_new_target').value = fmt(data.new_target);
@@ -640,7 +1706,7 @@ HTML_PAGE = r"""
         fd.append('cancel_actual_4w', getVal('cancel_actual_4w'));
         fd.append('cancel_actual_close', getVal('cancel_actual_close'));
 
-        fetch('/submit_actual', { method: 'POST', body: fd })
+        fetch('{{ request.script_root }}/submit_actual', { method: 'POST', body: fd })
             .then(res => res.text()).then(m => { alert(m); location.reload(); });
     }
 
@@ -651,14 +1717,21 @@ HTML_PAGE = r"""
         fd.append('new_target', getVal('admin_new_target'));
         fd.append('cancel_target', getVal('admin_cancel_target'));
 
-        fetch('/submit_target', { method: 'POST', body: fd })
+        fetch('{{ request.script_root }}/submit_target', { method: 'POST', body: fd })
             .then(res => res.text()).then(m => { alert(m); fetchTarget(); });
     }
 
     function loadDashboard() {
         const cat = document.getElementById('dash_category').value;
-        fetch(`/api/dashboard?category=${cat}`)
-            .then(res => res.json())
+        fetch(`{{ request.script_root }}/api/dashboard?category=${cat}`)
+            .then(res => {
+                // 마감 스냅샷으로 응답한 경우 고정 시점 표시
+                const snap = res.headers.get('X-Snapshot');
+                const badge = document.getElementById('snapshot_badge');
+                badge.style.display = snap ? 'inline' : 'none';
+                if (snap) badge.innerText = `📌 ${res.headers.get('X-Snapshot-Period')} ${res.headers.get('X-Snapshot-Label')} 마감 스냅샷 기준`;
+                return res.json();
+            })
             .then(data => {
                 const labels = data.map(d => d.region);
                 const targets = data.map(d => d.net_target);
@@ -673,6 +1746,28 @@ HTML_PAGE = r"""
 
                 renderCharts(labels, targets, actuals);
             });
+        loadHistory();
+    }
+
+    // 추이 차트: 서버에서 차트 폭만큼만 다운샘플링해서 받음
+    function loadHistory() {
+        const cat = document.getElementById('dash_category').value;
+        const region = document.getElementById('hist_region').value;
+        const points = Math.max(50, Math.floor(document.getElementById('historyChart').clientWidth / 2));
+        fetch(`{{ request.script_root }}/api/history?region=${encodeURIComponent(region)}&category=${encodeURIComponent(cat)}&points=${points}`)
+            .then(res => res.json())
+            .then(data => {
+                if(historyChart) historyChart.destroy();
+                const items = data.items || [];
+                historyChart = new Chart(document.getElementById('historyChart').getContext('2d'), {
+                    type: 'line',
+                    data: {
+                        labels: items.map(d => d.timestamp),
+                        datasets: [{ label: '순증 마감 전망', data: items.map(d => d.net_actual_close), borderColor: '#4f46e5', pointRadius: 0, tension: 0.2 }]
+                    },
+                    options: { responsive: true, maintainAspectRatio: false, animation: false, scales: { x: { ticks: { maxTicksLimit: 8 } } } }
+                });
+            });
     }
 
     function renderCharts(labels, targets, actuals) {
@@ -718,7 +1813,8 @@ HTML_PAGE = r"""
         });
     }
 
-    function exportData() { location.href = '/download'; }
+    function exportData() { location.href = '{{ request.script_root }}/download'; }
+    function exportPack() { location.href = '{{ request.script_root }}/download_pack'; }
 
     function triggerUpload() { document.getElementById('excelFile').click(); }
     function handleFileUpload(input) {
@@ -730,7 +1826,7 @@ HTML_PAGE = r"""
         const type = confirm("목표 데이터(targets) 업로드입니까? (취소 시 실적actuals 업로드)") ? 'target' : 'actual';
         fd.append('type', type);
 
-        fetch('/api/upload_excel', { method: 'POST', body: fd })
+        fetch('{{ request.script_root }}/api/upload_excel', { method: 'POST', body: fd })
             .then(res => res.json())
             .then(data => { alert(data.msg); location.reload(); })
             .catch(() => alert("업로드 실패"));
@@ -748,48 +1844,83 @@ def index():
 def get_target():
     region = request.args.get('region')
     category = request.args.get('category')
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    row = conn.execute("SELECT new_target, cancel_target FROM targets WHERE region=? AND category=?", (region, category)).fetchone()
+    replica = get_replica()
+    if replica:
+        snapshot = replica.snapshot
+        errors = invalid_dimensions(snapshot.registry, region, category)
+        if errors: return jsonify({"msg": ", ".join(errors)}), 400
+        return jsonify(snapshot.target(region, category))
+    conn = db_connect()
+    registry = get_registry(conn)
+    errors = invalid_dimensions(registry, region, category)
+    if errors:
+        conn.close()
+        return jsonify({"msg": ", ".join(errors)}), 400
+    matrix = get_targets_matrix(conn)
     conn.close()
-    if row: return jsonify(dict(row))
-    return jsonify({"new_target": 0, "cancel_target": 0})
+    return jsonify(matrix.target(region, category))
 
 @app.route('/api/dashboard', methods=['GET'])
 def get_dashboard():
     category = request.args.get('category')
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    # 대시보드 시각화를 '순증(신규-해지)' 기준으로 처리
-    query = """
-    SELECT t.region, (IFNULL(t.new_target, 0) - IFNULL(t.cancel_target, 0)) as net_target, 
-           (SELECT (IFNULL(new_actual_close, 0) - IFNULL(cancel_actual_close, 0)) FROM actuals a WHERE a.region = t.region AND a.category = t.category ORDER BY timestamp DESC LIMIT 1) as net_actual_close
-    FROM targets t WHERE t.category=?
-    """
-    rows = conn.execute(query, (category,)).fetchall()
+    frozen = serve_snapshot(f"dashboard/{category}", 'application/json')
+    if frozen is not None: return frozen
+    replica = get_replica()
+    if replica:
+        snapshot = replica.snapshot
+        if not snapshot.registry.is_active('category', category):
+            return jsonify({"msg": f"알 수 없는 카테고리: {category}"}), 400
+        return jsonify(snapshot.dashboard(category))
+    conn = db_connect()
+    registry = get_registry(conn)
+    if not registry.is_active('category', category):
+        conn.close()
+        return jsonify({"msg": f"알 수 없는 카테고리: {category}"}), 400
+    matrix = get_targets_matrix(conn)
+    # 대시보드 시각화를 '순증(신규-해지)' 기준으로 처리, 목표/달성률은 행렬 연산 (metadata 정렬 순서)
+    actuals = dict(conn.execute(SQL['dashboard_actuals'], (registry.id_of('category', category),)).fetchall())
     conn.close()
-    
-    # 정의된 REGIONS_ORDER 순서대로 데이터 정렬
-    results = [dict(row) for row in rows]
-    sorted_results = sorted(results, key=lambda x: REGIONS_ORDER.index(x['region']) if x['region'] in REGIONS_ORDER else 999)
-    
-    return jsonify(sorted_results)
+    return jsonify(matrix.dashboard(category, actuals))
 
 @app.route('/submit_target', methods=['POST'])
 def submit_target():
     data = (request.form.get('region'), request.form.get('category'), clean_num(request.form.get('new_target')), clean_num(request.form.get('cancel_target')))
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("INSERT OR REPLACE INTO targets (region, category, new_target, cancel_target) VALUES (?, ?, ?, ?)", data)
-    conn.commit()
+    conn = db_connect()
+    registry = get_registry(conn)
+    errors = invalid_dimensions(registry, data[0], data[1])
+    if errors:
+        conn.close()
+        return ", ".join(errors), 400
+    save_targets(conn, [(registry.id_of('region', data[0]), registry.id_of('category', data[1])) + data[2:]])
     conn.close()
+    notify_replica()
     return f"[{data[0]}] {data[1]} 목표가 설정되었습니다."
 
 @app.route('/api/metadata', methods=['GET'])
 def get_metadata():
-    # 정의된 순서대로 반환하여 UI 일관성 유지
-    return jsonify({"regions": REGIONS_ORDER, "categories": CATEGORIES_ORDER})
+    # metadata 의 정렬 순서대로 활성 항목만 반환하여 UI 일관성 유지
+    replica = get_replica()
+    registry = replica.snapshot.registry if replica else get_registry()
+    return jsonify({"regions": registry.names('region'), "categories": registry.names('category')})
+
+@app.route('/submit_metadata', methods=['POST'])
+def submit_metadata():
+    # 지역/카테고리 추가, 순서 변경, 사용 중지 (코드 배포 없이 DB 로 관리)
+    dim_type = request.form.get('type')
+    value = (request.form.get('value') or '').strip()
+    if dim_type not in DEFAULT_DIMENSIONS or not value: return "type(region/category)과 value 를 입력하세요.", 400
+    sort_order = request.form.get('sort_order')
+    params = {"type": dim_type, "value": value, "sort_order": int(clean_num(sort_order)) if sort_order else None,
+              "active": 0 if request.form.get('active') in ('0', 'false', 'N') else 1}
+    conn = db_connect()
+    conn.execute(SQL['save_metadata'], params)
+    conn.commit()
+    conn.close()
+    notify_replica()
+    return f"[{dim_type}] {value} 항목이 저장되었습니다."
 
 @app.route('/api/upload_excel', methods=['POST'])
+@admission_limited('upload_excel')
 def upload_excel():
     if 'file' not in request.files: return jsonify({"msg": "파일이 없습니다."}), 400
     file = request.files['file']
@@ -797,17 +1928,22 @@ def upload_excel():
     
     try:
         df = pd.read_excel(file)
-        conn = sqlite3.connect(DB_NAME)
+        conn = db_connect()
+        registry = get_registry(conn)
+        unknown = sorted({f"{r}/{c}" for r, c in zip(df['지역'], df['카테고리'])
+                          if invalid_dimensions(registry, r, c)})
+        if unknown:
+            conn.close()
+            return jsonify({"msg": f"알 수 없는 지역/카테고리가 있습니다: {', '.join(unknown[:10])}"}), 400
+        keys = [(registry.id_of('region', r), registry.id_of('category', c)) for r, c in zip(df['지역'], df['카테고리'])]
         if upload_type == 'target':
-            for _, row in df.iterrows():
-                conn.execute("INSERT OR REPLACE INTO targets (region, category, new_target, cancel_target) VALUES (?, ?, ?, ?)", 
-                             (row['지역'], row['카테고리'], row['신규목표'], row['해지목표']))
+            save_targets(conn, [k + v for k, v in zip(keys, df[['신규목표', '해지목표']].itertuples(index=False, name=None))])
         else:
-            for _, row in df.iterrows():
-                conn.execute("INSERT INTO actuals (region, category, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close) VALUES (?, ?, ?, ?, ?, ?)", 
-                             (row['지역'], row['카테고리'], row['신규4주차'], row['신규마감'], row['해지4주차'], row['해지마감']))
+            conn.executemany(SQL['save_actual'],
+                             [k + v for k, v in zip(keys, df[['신규4주차', '신규마감', '해지4주차', '해지마감']].itertuples(index=False, name=None))])
         conn.commit()
         conn.close()
+        notify_replica()
         return jsonify({"msg": f"성공적으로 {len(df)}건의 데이터를 업로드했습니다."})
     except Exception as e:
         return jsonify({"msg": f"오류 발생: {str(e)}"}), 500
@@ -817,37 +1953,63 @@ def submit_actual():
     data = (request.form.get('region'), request.form.get('category'),
             clean_num(request.form.get('new_actual_4w')), clean_num(request.form.get('new_actual_close')),
             clean_num(request.form.get('cancel_actual_4w')), clean_num(request.form.get('cancel_actual_close')))
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("INSERT INTO actuals (region, category, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close) VALUES (?, ?, ?, ?, ?, ?)", data)
+    conn = db_connect()
+    registry = get_registry(conn)
+    errors = invalid_dimensions(registry, data[0], data[1])
+    if errors:
+        conn.close()
+        return ", ".join(errors), 400
+    conn.execute(SQL['save_actual'],
+                 (registry.id_of('region', data[0]), registry.id_of('category', data[1])) + data[2:])
     conn.commit()
     conn.close()
+    notify_replica()
     return f"[{data[0]}] {data[1]} 실적이 저장되었습니다."
 
-# 달성률 포맷팅용 헬퍼 함수
-def calc_rate(actual, target):
-    if target == 0 or pd.isna(target): return '0%'
-    return f"{(actual / target * 100):.1f}%"
-
-def calc_gap_rate(actual, target):
-    if target == 0 or pd.isna(target): return '0%'
-    return f"{((actual - target) / target * 100):.1f}%"
+# 엑셀 내보내기 공통 헤더 (상위 그룹, 하위 항목)
+METRIC_SUBCOLUMNS = ['목표', '4주차 실적', '4주차 달성률', '마감 실적', '마감 달성률', 'GAP 금액', 'GAP %']
+EXPORT_COLUMNS = ([('기본정보', '지역'), ('기본정보', '카테고리')] +
+                  [(group, sub) for group in ('신규', '해지', '순증') for sub in METRIC_SUBCOLUMNS] +
+                  [('시스템', '입력시간')])
 
 @app.route('/download')
 def download():
-    conn = sqlite3.connect(DB_NAME)
-    query = """
-    SELECT a.region, a.category, 
-           IFNULL(t.new_target, 0) as new_target, a.new_actual_4w, a.new_actual_close,
-           IFNULL(t.cancel_target, 0) as cancel_target, a.cancel_actual_4w, a.cancel_actual_close,
-           a.timestamp
-    FROM actuals a
-    LEFT JOIN targets t ON a.region = t.region AND a.category = t.category
-    ORDER BY a.timestamp DESC
-    """
-    df = pd.read_sql_query(query, conn)
+    frozen = serve_snapshot('download.zip', 'application/zip', f"{datetime.now().strftime('%Y%m%d_%H%M')}_마감취합_V5.zip")
+    if frozen is not None: return frozen
+    conn = db_connect()
+    version = get_data_version(conn)
     conn.close()
+    # 같은 데이터 버전의 동시 내보내기는 한 번만 생성해서 공유
+    content = run_heavy('download', build_download_zip, key=(current_db(), version))
+    if content is None: return "아직 데이터가 없습니다."
+    filename = f"{datetime.now().strftime('%Y%m%d_%H%M')}_마감취합_V5.zip"
+    return send_file(io.BytesIO(content), download_name=filename, as_attachment=True)
 
-    if df.empty: return "아직 데이터가 없습니다."
+def build_download_zip():
+    conn = db_connect()
+    conn.execute("BEGIN")
+    df = pd.read_sql_query(SQL['download'], conn)
+    matrix = get_targets_matrix(conn)
+    conn.close()
+    return render_download_zip(df, matrix)
+
+def _write_export_header(sheet, columns):
+    # 1행: 그룹명(같은 그룹끼리 병합), 2행: 항목명
+    start = 0
+    for i, (group, name) in enumerate(columns):
+        sheet.cell(row=2, column=i + 1, value=name)
+        if i + 1 == len(columns) or columns[i + 1][0] != group:
+            sheet.cell(row=1, column=start + 1, value=group)
+            if i > start: sheet.merge_cells(start_row=1, start_column=start + 1, end_row=1, end_column=i + 1)
+            start = i + 1
+
+def render_download_zip(df, matrix):
+    # df: region, category, 실적 4개 열, timestamp (실시간 조회 또는 마감 스냅샷)
+    if df.empty: return None
+
+    # 목표는 행렬에서 코드 배열로 한 번에 조회
+    df['new_target'], df['cancel_target'] = matrix.lookup_targets(matrix.codes_of_names('region', df['region'].tolist()),
+                                                                   matrix.codes_of_names('category', df['category'].tolist()))
 
     # 순증 계산
     df['net_target'] = df['new_target'] - df['cancel_target']
@@ -855,13 +2017,7 @@ def download():
     df['net_actual_close'] = df['new_actual_close'] - df['cancel_actual_close']
 
     # ★ 핵심: 엑셀 파일 헤더 병합을 위한 Pandas MultiIndex 구조 세팅
-    columns = pd.MultiIndex.from_tuples([
-        ('기본정보', '지역'), ('기본정보', '카테고리'),
-        ('신규', '목표'), ('신규', '4주차 실적'), ('신규', '4주차 달성률'), ('신규', '마감 실적'), ('신규', '마감 달성률'), ('신규', 'GAP 금액'), ('신규', 'GAP %'),
-        ('해지', '목표'), ('해지', '4주차 실적'), ('해지', '4주차 달성률'), ('해지', '마감 실적'), ('해지', '마감 달성률'), ('해지', 'GAP 금액'), ('해지', 'GAP %'),
-        ('순증', '목표'), ('순증', '4주차 실적'), ('순증', '4주차 달성률'), ('순증', '마감 실적'), ('순증', '마감 달성률'), ('순증', 'GAP 금액'), ('순증', 'GAP %'),
-        ('시스템', '입력시간')
-    ])
+    columns = pd.MultiIndex.from_tuples(EXPORT_COLUMNS)
     
     export_df = pd.DataFrame(columns=columns)
     
@@ -871,51 +2027,774 @@ def download():
     # 신규
     export_df[('신규', '목표')] = df['new_target']
     export_df[('신규', '4주차 실적')] = df['new_actual_4w']
-    export_df[('신규', '4주차 달성률')] = df.apply(lambda r: calc_rate(r['new_actual_4w'], r['new_target']), axis=1)
+    export_df[('신규', '4주차 달성률')] = _rate_labels(df['new_actual_4w'].to_numpy(), df['new_target'].to_numpy())
     export_df[('신규', '마감 실적')] = df['new_actual_close']
-    export_df[('신규', '마감 달성률')] = df.apply(lambda r: calc_rate(r['new_actual_close'], r['new_target']), axis=1)
+    export_df[('신규', '마감 달성률')] = _rate_labels(df['new_actual_close'].to_numpy(), df['new_target'].to_numpy())
     export_df[('신규', 'GAP 금액')] = df['new_actual_close'] - df['new_target']
-    export_df[('신규', 'GAP %')] = df.apply(lambda r: calc_gap_rate(r['new_actual_close'], r['new_target']), axis=1)
+    export_df[('신규', 'GAP %')] = _rate_labels((df['new_actual_close'] - df['new_target']).to_numpy(), df['new_target'].to_numpy())
 
     # 해지
     export_df[('해지', '목표')] = df['cancel_target']
     export_df[('해지', '4주차 실적')] = df['cancel_actual_4w']
-    export_df[('해지', '4주차 달성률')] = df.apply(lambda r: calc_rate(r['cancel_actual_4w'], r['cancel_target']), axis=1)
+    export_df[('해지', '4주차 달성률')] = _rate_labels(df['cancel_actual_4w'].to_numpy(), df['cancel_target'].to_numpy())
     export_df[('해지', '마감 실적')] = df['cancel_actual_close']
-    export_df[('해지', '마감 달성률')] = df.apply(lambda r: calc_rate(r['cancel_actual_close'], r['cancel_target']), axis=1)
+    export_df[('해지', '마감 달성률')] = _rate_labels(df['cancel_actual_close'].to_numpy(), df['cancel_target'].to_numpy())
     export_df[('해지', 'GAP 금액')] = df['cancel_actual_close'] - df['cancel_target']
-    export_df[('해지', 'GAP %')] = df.apply(lambda r: calc_gap_rate(r['cancel_actual_close'], r['cancel_target']), axis=1)
+    export_df[('해지', 'GAP %')] = _rate_labels((df['cancel_actual_close'] - df['cancel_target']).to_numpy(), df['cancel_target'].to_numpy())
 
     # 순증
     export_df[('순증', '목표')] = df['net_target']
     export_df[('순증', '4주차 실적')] = df['net_actual_4w']
-    export_df[('순증', '4주차 달성률')] = df.apply(lambda r: calc_rate(r['net_actual_4w'], r['net_target']), axis=1)
+    export_df[('순증', '4주차 달성률')] = _rate_labels(df['net_actual_4w'].to_numpy(), df['net_target'].to_numpy())
     export_df[('순증', '마감 실적')] = df['net_actual_close']
-    export_df[('순증', '마감 달성률')] = df.apply(lambda r: calc_rate(r['net_actual_close'], r['net_target']), axis=1)
+    export_df[('순증', '마감 달성률')] = _rate_labels(df['net_actual_close'].to_numpy(), df['net_target'].to_numpy())
     export_df[('순증', 'GAP 금액')] = df['net_actual_close'] - df['net_target']
-    export_df[('순증', 'GAP %')] = df.apply(lambda r: calc_gap_rate(r['net_actual_close'], r['net_target']), axis=1)
+    export_df[('순증', 'GAP %')] = _rate_labels((df['net_actual_close'] - df['net_target']).to_numpy(), df['net_target'].to_numpy())
     
     export_df[('시스템', '입력시간')] = df['timestamp']
 
-    # 메모리에 엑셀 생성
+    # 메모리에 엑셀 생성 (pandas 는 MultiIndex 열을 index=False 로 쓰지 못하므로 값은 평평한 열로 3행부터, 2단 헤더는 직접 기록)
     excel_file = io.BytesIO()
     with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-        export_df.to_excel(writer, index=False, sheet_name='마감회의자료_취합')
+        export_df.set_axis(range(len(EXPORT_COLUMNS)), axis=1).to_excel(writer, index=False, header=False, startrow=2, sheet_name='마감회의자료_취합')
+        _write_export_header(writer.sheets['마감회의자료_취합'], EXPORT_COLUMNS)
     excel_file.seek(0)
 
     memory_file = io.BytesIO()
     with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
         zf.writestr('회의자료_동기화결과.xlsx', excel_file.getvalue())
-    memory_file.seek(0)
+    return memory_file.getvalue()
+
+# 3. 회의자료 팩 (카테고리별 시트 + 지역 요약 + 합계) 병렬 생성
+PACK_VALUE_COLUMNS = ['new_target', 'new_actual_4w', 'new_actual_close', 'cancel_target', 'cancel_actual_4w', 'cancel_actual_close']
+PACK_SUMMARY_COLUMNS = [('기본정보', '지역')] + EXPORT_COLUMNS[2:-1]
+PACK_TOTAL_COLUMNS = [('기본정보', '카테고리')] + EXPORT_COLUMNS[2:-1]
+
+_report_pool = None
+_pack_cache = {}
+_pack_lock = threading.Lock()
+
+def get_report_pool():
+    global _report_pool
+    workers = REPORT_WORKERS or multiprocessing.cpu_count()
+    if workers <= 1: return None
+    if _report_pool is None:
+        _report_pool = ProcessPoolExecutor(max_workers=workers)
+    return _report_pool
+
+def load_pack_data(conn):
+    # 조회 결과를 DataFrame 대신 코드 배열/숫자 행렬로 압축해 워커에 전달
+    # 정수 키/epoch 초를 그대로 읽어 문자열 변환 없이 배열화
+    df = pd.read_sql_query(SQL['pack'], conn)
+    if df.empty: return None
+    return pack_data(df, get_targets_matrix(conn))
+
+def pack_data(df, matrix):
+    # df: region_id, category_id, 실적 4개 열(결측은 0), ts (최신순)
+    region_codes = matrix.codes_of_ids('region', df['region_id'].to_numpy())
+    category_codes = matrix.codes_of_ids('category', df['category_id'].to_numpy())
+    df['new_target'], df['cancel_target'] = matrix.lookup_targets(region_codes, category_codes)
+    return {
+        'regions': tuple(matrix.registry.all_names('region')),
+        'categories': tuple(matrix.registry.all_names('category')),
+        'region_codes': region_codes,
+        'category_codes': category_codes,
+        'values': df[PACK_VALUE_COLUMNS].to_numpy(dtype=np.float64),
+        'timestamps': df['ts'].to_numpy(dtype=np.int64).astype('datetime64[s]'),
+    }
 
-    filename = f"{datetime.now().strftime('%Y%m%d_%H%M')}_마감취합_V5.zip"
-    return send_file(memory_file, download_name=filename, as_attachment=True)
+# 달성률 포맷팅 (목표 0 이면 0%), 열 단위로 한 번에 계산
+def _rate_labels(actual, target):
+    labels = np.full(actual.shape, '0%', dtype=object)
+    nz = target != 0
+    labels[nz] = [f"{v:.1f}%" for v in (actual[nz] / target[nz] * 100).tolist()]
+    return labels
+
+def _metric_columns(values):
+    # values 열 순서: PACK_VALUE_COLUMNS (순증 = 신규 - 해지)
+    groups = [values[:, 0:3], values[:, 3:6], values[:, 0:3] - values[:, 3:6]]
+    columns = []
+    for g in groups:
+        target, actual_4w, actual_close = g[:, 0], g[:, 1], g[:, 2]
+        columns += [target, actual_4w, _rate_labels(actual_4w, target), actual_close, _rate_labels(actual_close, target),
+                    actual_close - target, _rate_labels(actual_close - target, target)]
+    return columns
+
+def _col_letter(idx):
+    letters = ''
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def _sheet_xml(header, columns):
+    # 2단 헤더(그룹 병합) + 데이터 행을 SpreadsheetML 로 직접 직렬화 (inline string 사용)
+    letters = [_col_letter(i) for i in range(len(header))]
+    rows = []
+    for r, level in ((1, 0), (2, 1)):
+        cells = ''.join(f'<c r="{l}{r}" s="1" t="inlineStr"><is><t>{escape(h[level])}</t></is></c>' for l, h in zip(letters, header))
+        rows.append(f'<row r="{r}">{cells}</row>')
+
+    rendered = []
+    for l, col in zip(letters, columns):
+        if col.dtype == object:
+            rendered.append([f'<c r="{l}{r}" t="inlineStr"><is><t>{escape(str(v))}</t></is></c>' for r, v in enumerate(col.tolist(), 3)])
+        else:
+            rendered.append(['' if v != v else f'<c r="{l}{r}" s="2"><v>{v!r}</v></c>' for r, v in enumerate(col.tolist(), 3)])
+    rows += [f'<row r="{r}">{"".join(cells)}</row>' for r, cells in enumerate(zip(*rendered), 3)]
+
+    merges, start = [], 0
+    for i in range(1, len(header) + 1):
+        if i == len(header) or header[i][0] != header[start][0]:
+            if i - start > 1: merges.append(f'<mergeCell ref="{letters[start]}1:{letters[i - 1]}1"/>')
+            start = i
+    merge_xml = f'<mergeCells count="{len(merges)}">{"".join(merges)}</mergeCells>' if merges else ''
+
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<sheetViews><sheetView workbookViewId="0"><pane ySplit="2" topLeftCell="A3" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+            f'<sheetData>{"".join(rows)}</sheetData>{merge_xml}</worksheet>').encode('utf-8')
+
+def _render_pack_sheet(task):
+    # 프로세스 풀 워커: 시트 하나를 독립적으로 렌더링
+    kind, names, codes, values, timestamps = task
+    if kind == 'category':
+        category, regions = names
+        header = EXPORT_COLUMNS
+        time_labels = np.char.replace(np.datetime_as_string(timestamps, unit='s'), 'T', ' ').astype(object)
+        columns = [np.array(regions, dtype=object)[codes], np.full(len(codes), category, dtype=object)] + _metric_columns(values) + [time_labels]
+    else:
+        # 최신 실적을 지역/카테고리별로 합산하고 마지막에 합계 행 추가
+        totals = np.zeros((len(names), values.shape[1]))
+        np.add.at(totals, codes, values)
+        totals = np.vstack([totals, totals.sum(axis=0)])
+        header = PACK_SUMMARY_COLUMNS if kind == 'region' else PACK_TOTAL_COLUMNS
+        columns = [np.append(np.array(names, dtype=object), '합계')] + _metric_columns(totals)
+    return _sheet_xml(header, columns)
+
+def _sheet_title(name, used):
+    title = ''.join('_' if ch in '[]:*?/\\' else ch for ch in name)[:31]
+    base, n = title, 2
+    while title in used:
+        title = f"{base[:28]}({n})"
+        n += 1
+    used.add(title)
+    return title
+
+def _assemble_xlsx(sheets):
+    # 워커가 만든 시트 XML 을 하나의 통합문서(xlsx 패키지)로 조립
+    ns = 'http://schemas.openxmlformats.org/'
+    sheet_entries = ''.join(f'<sheet name="{escape(title, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>' for i, (title, _) in enumerate(sheets, 1))
+    sheet_rels = ''.join(f'<Relationship Id="rId{i}" Type="{ns}officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{i}.xml"/>' for i in range(1, len(sheets) + 1))
+    sheet_types = ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' for i in range(1, len(sheets) + 1))
+    head = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', f'{head}<Types xmlns="{ns}package/2006/content-types">'
+                    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                    '<Default Extension="xml" ContentType="application/xml"/>'
+                    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                    f'{sheet_types}</Types>')
+        zf.writestr('_rels/.rels', f'{head}<Relationships xmlns="{ns}package/2006/relationships">'
+                    f'<Relationship Id="rId1" Type="{ns}officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+        zf.writestr('xl/workbook.xml', f'{head}<workbook xmlns="{ns}spreadsheetml/2006/main" xmlns:r="{ns}officeDocument/2006/relationships">'
+                    f'<sheets>{sheet_entries}</sheets></workbook>')
+        zf.writestr('xl/_rels/workbook.xml.rels', f'{head}<Relationships xmlns="{ns}package/2006/relationships">{sheet_rels}'
+                    f'<Relationship Id="rId{len(sheets) + 1}" Type="{ns}officeDocument/2006/relationships/styles" Target="styles.xml"/></Relationships>')
+        zf.writestr('xl/styles.xml', f'{head}<styleSheet xmlns="{ns}spreadsheetml/2006/main">'
+                    '<fonts count="2"><font><sz val="11"/><name val="Malgun Gothic"/></font><font><b/><sz val="11"/><name val="Malgun Gothic"/></font></fonts>'
+                    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+                    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+                    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+                    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1"><alignment horizontal="center"/></xf>'
+                    '<xf numFmtId="3" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+                    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles></styleSheet>')
+        for i, (_, xml) in enumerate(sheets, 1):
+            zf.writestr(f'xl/worksheets/sheet{i}.xml', xml)
+    return out.getvalue()
+
+def pack_tasks(data):
+    regions, categories = data['regions'], data['categories']
+    rc, cc, values = data['region_codes'], data['category_codes'], data['values']
+    # 최신 실적: 최신순 정렬 기준 (지역, 카테고리) 별 첫 행
+    _, latest = np.unique(rc.astype(np.int64) * len(categories) + cc, return_index=True)
+
+    titles, tasks = [], []
+    for ci, category in enumerate(categories):
+        mask = cc == ci
+        if not mask.any(): continue
+        titles.append(category)
+        tasks.append(('category', (category, regions), rc[mask], values[mask], data['timestamps'][mask]))
+    titles += ['지역별 요약', '전체 합계']
+    tasks.append(('region', regions, rc[latest], values[latest], None))
+    tasks.append(('total', categories, cc[latest], values[latest], None))
+    return titles, tasks
+
+def render_meeting_pack(data, executor=None):
+    titles, tasks = pack_tasks(data)
+    # 가장 큰 시트부터 제출해 워커 간 부하를 고르게 분산
+    order = sorted(range(len(tasks)), key=lambda i: -len(tasks[i][2]))
+    mapper = executor.map if executor is not None else map
+    rendered = dict(zip(order, mapper(_render_pack_sheet, [tasks[i] for i in order])))
+    used = set()
+    return _assemble_xlsx([(_sheet_title(t, used), rendered[i]) for i, t in enumerate(titles)])
+
+def build_meeting_pack(db_name=None):
+    # 데이터 버전이 같으면 캐시된 통합문서를 그대로 반환
+    db_name = db_name or current_db()
+    conn = sqlite3.connect(db_name)
+    version = get_data_version(conn)
+    conn.close()
+    with _pack_lock:
+        cached = _pack_cache.get(db_name)
+    if cached and cached[0] == version: return cached[1]
+
+    # 같은 버전을 동시에 요청하면 조회/렌더링은 한 번만 수행
+    content = run_heavy('download_pack', lambda: _render_pack(db_name), key=(db_name, version))
+    with _pack_lock:
+        _pack_cache[db_name] = (version, content)
+    return content
+
+def _render_pack(db_name):
+    conn = sqlite3.connect(db_name)
+    try:
+        conn.execute("BEGIN")
+        data = load_pack_data(conn)
+    finally:
+        conn.close()
+    return render_meeting_pack(data, executor=get_report_pool()) if data else None
+
+@app.route('/download_pack')
+def download_pack():
+    frozen = serve_snapshot('pack.xlsx', XLSX_MIMETYPE, f"{datetime.now().strftime('%Y%m%d_%H%M')}_마감회의자료_팩_V5.xlsx")
+    if frozen is not None: return frozen
+    content = build_meeting_pack()
+    if content is None: return "아직 데이터가 없습니다."
+    filename = f"{datetime.now().strftime('%Y%m%d_%H%M')}_마감회의자료_팩_V5.xlsx"
+    return send_file(io.BytesIO(content), download_name=filename, as_attachment=True)
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# 4. 지역/카테고리별 이력 조회 (키셋 페이지네이션 + 서버측 다운샘플링)
+HISTORY_PAGE_SIZE = 500
+HISTORY_MAX_PAGE_SIZE = 5000
+HISTORY_MIN_POINTS = 3      # LTTB 는 첫/끝 점 + 1구간 이상이 있어야 의미가 있음
+HISTORY_MAX_POINTS = 2000
+HISTORY_COLUMNS = ['new_actual_4w', 'new_actual_close', 'cancel_actual_4w', 'cancel_actual_close']
+
+def parse_epoch(value, end=False):
+    # 'YYYY-MM-DD' 또는 'YYYY-MM-DD HH:MM:SS' → epoch 초 (날짜만 주면 to 는 그날 끝까지 포함)
+    # 시간대가 붙은 값('...+09:00')은 저장 기준인 UTC 로 환산
+    if not value: return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None: dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    epoch = int((dt - datetime(1970, 1, 1)).total_seconds())
+    if end and len(value) <= 10: epoch += 86399
+    return epoch
+
+def lttb_indices(x, y, points):
+    # Largest-Triangle-Three-Buckets: 첫/끝 점 고정, 사이 구간마다 면적이 가장 큰 점 선택
+    size = len(x)
+    if points >= size or points < 3: return np.arange(size)
+    bounds = np.append(np.linspace(1, size - 1, points - 1).astype(np.int64), size)
+    counts = np.diff(bounds)
+    avg_x = np.add.reduceat(x, bounds[:-1]) / counts
+    avg_y = np.add.reduceat(y, bounds[:-1]) / counts
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def minmax_indices(y, points):
+    # 구간별 최소/최대 점만 남김 (정렬 한 번으로 전 구간 동시 계산)
+    size = len(y)
+    if points >= size or points < 2: return np.arange(size)
+    buckets = (np.arange(size) * (points // 2) // size).astype(np.int64)
+    order = np.lexsort((y, buckets))
+    starts = np.searchsorted(buckets[order], np.arange(points // 2))
+    ends = np.append(starts[1:], size) - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+def _history_items(rows):
+    if not rows: return []
+    ts = np.array([r[0] for r in rows], dtype=np.int64)
+    labels = np.char.replace(np.datetime_as_string(ts.astype('datetime64[s]'), unit='s'), 'T', ' ')
+    items = []
+    for label, (_, row_id, *values) in zip(labels.tolist(), rows):
+        item = {"id": row_id, "timestamp": label}
+        item.update(zip(HISTORY_COLUMNS, values))
+        item["net_actual_4w"] = (item['new_actual_4w'] or 0) - (item['cancel_actual_4w'] or 0)
+        item["net_actual_close"] = (item['new_actual_close'] or 0) - (item['cancel_actual_close'] or 0)
+        items.append(item)
+    return items
+
+@app.route('/api/history', methods=['GET'])
+def get_history():
+    region = request.args.get('region')
+    category = request.args.get('category')
+    try:
+        start = parse_epoch(request.args.get('from'))
+        end = parse_epoch(request.args.get('to'), end=True)
+        limit = max(1, min(int(request.args.get('limit') or HISTORY_PAGE_SIZE), HISTORY_MAX_PAGE_SIZE))
+        points = int(request.args.get('points') or 0)
+        # 점 수를 너무 작게 주어도 전체 행이 아니라 최소 점 수로 줄여서 응답 크기를 제한
+        points = max(HISTORY_MIN_POINTS, min(points, HISTORY_MAX_POINTS)) if points > 0 else 0
+        cursor = request.args.get('cursor')
+        after = tuple(int(v) for v in cursor.split('_')) if cursor else (-1, -1)
+        if len(after) != 2: raise ValueError(f"cursor 형식 오류: {cursor}")
+    except ValueError:
+        return jsonify({"msg": "from/to/limit/points/cursor 형식이 올바르지 않습니다."}), 400
+
+    conn = db_connect()
+    registry = get_registry(conn)
+    # 비활성 항목도 과거 이력은 조회 가능
+    region_id, category_id = registry.id_of('region', region), registry.id_of('category', category)
+    if region_id is None or category_id is None:
+        conn.close()
+        return jsonify({"msg": f"알 수 없는 지역/카테고리: {region}/{category}"}), 400
+
+    params = [region_id, category_id, start if start is not None else 0, end if end is not None else 2 ** 62]
+    if points:
+        # 다운샘플링: 구간 전체를 서버에서 읽어 순증 마감 실적 기준으로 점 선택
+        rows = conn.execute(SQL['history_range'], params).fetchall()
+        conn.close()
+        if rows:
+            y = np.array([(r[3] or 0) - (r[5] or 0) for r in rows], dtype=np.float64)
+            if request.args.get('mode') == 'minmax':
+                keep = minmax_indices(y, points)
+            else:
+                keep = lttb_indices(np.array([r[0] for r in rows], dtype=np.float64), y, points)
+            rows = [rows[i] for i in keep.tolist()]
+        return jsonify({"region": region, "category": category, "items": _history_items(rows),
+                        "downsampled": True, "next_cursor": None})
+
+    rows = conn.execute(SQL['history_page'], params + [after[0], after[1], limit + 1]).fetchall()
+    conn.close()
+    next_cursor = f"{rows[limit - 1][0]}_{rows[limit - 1][1]}" if len(rows) > limit else None
+    return jsonify({"region": region, "category": category, "items": _history_items(rows[:limit]),
+                    "downsampled": False, "next_cursor": next_cursor})
+
+# 5. 마감 스냅샷 (close freeze): 체크포인트에 최신 실적/목표를 고정하고 대시보드/내보내기 결과를 미리 렌더링
+_active_snapshots = {}   # DB 경로 → (확인 시각, 스냅샷 행 또는 None)
+_artifact_cache = OrderedDict()   # (DB 경로, 스냅샷 id, 이름) → bytes, 스냅샷은 불변이므로 만료 없이 바이트 상한 LRU
+_artifact_cache_bytes = 0
+_snapshot_lock = threading.Lock()
+
+def due_checkpoints(now):
+    # 이번 달 체크포인트 중 이미 지났고 제공 기간이 남은 것: (이름, 기간, 시각)
+    last_day = calendar.monthrange(now.year, now.month)[1]
+    for label, (day, hhmm) in SNAPSHOT_CHECKPOINTS.items():
+        hour, minute = (int(v) for v in hhmm.split(':'))
+        at = datetime(now.year, now.month, last_day if day < 0 else min(day, last_day), hour, minute)
+        if at <= now < at + timedelta(hours=SNAPSHOT_SERVE_HOURS):
+            yield label, now.strftime('%Y-%m'), at
+
+def freeze_snapshot(db_name, label, period, checkpoint_at):
+    # 쓰기 잠금을 잡은 상태에서 최신 실적/목표를 복사 → 같은 시점의 일관된 값, 이미 있으면 None
+    conn = sqlite3.connect(db_name, timeout=30)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute(SQL['snapshot_find'], (label, period)).fetchone(): return None
+        snapshot_id = conn.execute(SQL['snapshot_create'], (label, period, int(checkpoint_at), int(time.time()),
+                                                             get_data_version(conn))).lastrowid
+        conn.execute(SQL['snapshot_freeze'], (snapshot_id,))
+        conn.execute(SQL['snapshot_freeze_actuals'], (snapshot_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    with _snapshot_lock:
+        _active_snapshots.pop(os.path.abspath(db_name), None)
+    # 회의 전에 결과물을 미리 만들어 둠 (실패해도 스냅샷은 유지, 요청 시 다시 렌더링)
+    for name in snapshot_artifact_names(db_name):
+        try:
+            snapshot_artifact(db_name, snapshot_id, name)
+        except Exception:
+            app.logger.exception("snapshot %s: %s 렌더링 실패", snapshot_id, name)
+    return snapshot_id
+
+def snapshot_artifact_names(db_name):
+    return [f"dashboard/{c}" for c in get_registry(db_name=db_name).names('category')] + ['download.zip', 'pack.xlsx']
+
+def active_snapshot(db_name):
+    # 제공 기간 안의 가장 최근 체크포인트 스냅샷 (SNAPSHOT_POLL_SECONDS 동안 메모리에서 재사용)
+    # 수동 스냅샷은 자동 제공 대상이 아님 (?snapshot=<id> 로만 조회)
+    db_name = os.path.abspath(db_name)
+    now = time.time()
+    with _snapshot_lock:
+        cached = _active_snapshots.get(db_name)
+    if cached is None or now - cached[0] > SNAPSHOT_POLL_SECONDS:
+        conn = sqlite3.connect(db_name)
+        try:
+            rows = conn.execute(SQL['snapshot_active'], (int(now), int(now - SNAPSHOT_SERVE_HOURS * 3600))).fetchall()
+            row = next((r for r in rows if r[1] in SNAPSHOT_CHECKPOINTS), None)
+        finally:
+            conn.close()
+        cached = (now, row)
+        with _snapshot_lock:
+            _active_snapshots[db_name] = cached
+    row = cached[1]
+    if row is None or now >= row[3] + SNAPSHOT_SERVE_HOURS * 3600: return None
+    return row
+
+def snapshot_artifact(db_name, snapshot_id, name):
+    db_name = os.path.abspath(db_name)
+    key = (db_name, snapshot_id, name)
+    with _snapshot_lock:
+        content = _artifact_cache.get(key)
+        if content is not None: _artifact_cache.move_to_end(key)
+    if content is not None: return content
+    conn = sqlite3.connect(db_name, timeout=30)
+    try:
+        row = conn.execute(SQL['snapshot_artifact'], (snapshot_id, name)).fetchone()
+        if row:
+            content = bytes(row[0])
+        else:
+            content = render_snapshot_artifact(conn, snapshot_id, name)
+            if content is None: return None
+            conn.execute(SQL['snapshot_artifact_save'], (snapshot_id, name, content))
+            conn.commit()
+    finally:
+        conn.close()
+    cache_artifact(key, content)
+    return content
+
+def cache_artifact(key, content):
+    # 상한을 넘으면 가장 오래 안 쓴 결과물부터 버림 (상한보다 큰 결과물은 캐시하지 않고 매번 DB 에서 읽음)
+    global _artifact_cache_bytes
+    if len(content) > SNAPSHOT_CACHE_BYTES: return
+    with _snapshot_lock:
+        old = _artifact_cache.pop(key, None)
+        if old is not None: _artifact_cache_bytes -= len(old)
+        _artifact_cache[key] = content
+        _artifact_cache_bytes += len(content)
+        while _artifact_cache_bytes > SNAPSHOT_CACHE_BYTES:
+            _, evicted = _artifact_cache.popitem(last=False)
+            _artifact_cache_bytes -= len(evicted)
+
+def drop_snapshot_artifacts(db_path):
+    global _artifact_cache_bytes
+    with _snapshot_lock:
+        for key in [k for k in _artifact_cache if k[0] == db_path]:
+            _artifact_cache_bytes -= len(_artifact_cache.pop(key))
+
+def render_snapshot_artifact(conn, snapshot_id, name):
+    rows = conn.execute(SQL['snapshot_rows'], (snapshot_id,)).fetchall()
+    registry = get_registry(conn)
+    matrix = TargetsMatrix(-1, registry, [r[:4] for r in rows if r[2] is not None or r[3] is not None])
+    if name.startswith('dashboard/'):
+        category = name.split('/', 1)[1]
+        if not registry.is_active('category', category): return None
+        category_id = registry.id_of('category', category)
+        net_close = {r[0]: (r[5] or 0) - (r[7] or 0) for r in rows if r[1] == category_id and r[8] is not None}
+        return app.json.dumps(matrix.dashboard(category, net_close)).encode()
+    # 대시보드는 칸별 최신 실적(snapshot_rows), 내보내기는 고정 시점까지의 실적 전체 이력(snapshot_actuals)
+    if name not in ('pack.xlsx', 'download.zip'): return None
+    df = pd.read_sql_query(SQL['snapshot_actuals'], conn, params=(snapshot_id,))
+    if name == 'pack.xlsx':
+        if df.empty: return None
+        data = pack_data(df.fillna(0), matrix)
+        return render_meeting_pack(data, executor=get_report_pool())
+    if name == 'download.zip':
+        regions, categories = np.array(registry.all_names('region'), dtype=object), np.array(registry.all_names('category'), dtype=object)
+        df.insert(0, 'region', regions[matrix.codes_of_ids('region', df.pop('region_id').to_numpy())])
+        df.insert(1, 'category', categories[matrix.codes_of_ids('category', df.pop('category_id').to_numpy())])
+        df['timestamp'] = pd.to_datetime(df.pop('ts'), unit='s').dt.strftime('%Y-%m-%d %H:%M:%S')
+        return render_download_zip(df, matrix)
+    return None
+
+def serve_snapshot(name, mimetype, download_name=None):
+    # ?snapshot=<id> 이면 해당 스냅샷, 아니면 제공 기간 중인 스냅샷 (?live=1 이면 사용 안 함)
+    if request.args.get('live') == '1': return None
+    db_name = current_db()
+    snapshot_id = request.args.get('snapshot')
+    if snapshot_id:
+        conn = db_connect()
+        row = conn.execute(SQL['snapshot_get'], (int(snapshot_id) if snapshot_id.isdigit() else -1,)).fetchone()
+        conn.close()
+        if row is None: return jsonify({"msg": f"없는 스냅샷입니다: {snapshot_id}"}), 404
+    else:
+        row = active_snapshot(db_name)
+        if row is None: return None
+    content = snapshot_artifact(db_name, row[0], name)
+    if content is None:
+        if name.startswith('dashboard/'): return jsonify({"msg": f"알 수 없는 카테고리: {name.split('/', 1)[1]}"}), 400
+        return "아직 데이터가 없습니다."
+    if download_name:
+        response = send_file(io.BytesIO(content), mimetype=mimetype, download_name=download_name, as_attachment=True)
+    else:
+        response = app.response_class(content, mimetype=mimetype)
+    response.headers.update({'X-Snapshot': str(row[0]), 'X-Snapshot-Label': row[1], 'X-Snapshot-Period': row[2]})
+    return response
+
+def run_due_snapshots(now=None):
+    # 기본 DB 와 조직별 DB 각각에 대해 아직 고정되지 않은 체크포인트를 고정
+    now = now or datetime.now()
+    frozen = []
+    for path in [DB_NAME] + tenant_db_files():
+        path = os.path.abspath(path)
+        for label, period, at in due_checkpoints(now):
+            try:
+                ensure_schema(path)
+                snapshot_id = freeze_snapshot(path, label, period, at.timestamp())
+            except Exception:
+                app.logger.exception("snapshot freeze failed: %s %s %s", path, label, period)
+                continue
+            if snapshot_id is not None: frozen.append((path, label, period, snapshot_id))
+    return frozen
+
+def start_snapshot_scheduler():
+    if not SNAPSHOT_CHECKPOINTS: return None
+    def run():
+        while True:
+            for path, label, period, snapshot_id in run_due_snapshots():
+                app.logger.info("snapshot: %s %s %s → %s", path, period, label, snapshot_id)
+            time.sleep(SNAPSHOT_POLL_SECONDS)
+    thread = threading.Thread(target=run, daemon=True, name='snapshot-scheduler')
+    thread.start()
+    return thread
+
+@app.route('/api/snapshots', methods=['GET', 'POST'])
+def snapshots():
+    # GET: 스냅샷 목록, POST: 지금 시점으로 수동 고정 (label=manual, 자동 제공되지 않고 ?snapshot=<id> 로 조회)
+    db_name = current_db()
+    if request.method == 'POST':
+        now = datetime.now()
+        snapshot_id = run_heavy('snapshot', lambda: freeze_snapshot(db_name, 'manual', now.strftime('%Y-%m-%d %H:%M:%S'), now.timestamp()))
+        return jsonify({"snapshot": snapshot_id})
+    conn = db_connect()
+    rows = conn.execute(SQL['snapshot_list']).fetchall()
+    conn.close()
+    active = active_snapshot(db_name)
+    return jsonify({"snapshots": [{"id": r[0], "label": r[1], "period": r[2], "checkpoint_at": datetime.fromtimestamp(r[3]).strftime('%Y-%m-%d %H:%M:%S'),
+                                   "created_at": datetime.fromtimestamp(r[4]).strftime('%Y-%m-%d %H:%M:%S'), "data_version": r[5],
+                                   "rows": r[6], "serving": bool(active and active[0] == r[0])} for r in rows]})
+
+# 6. 목표 배분 시뮬레이션: 전사 목표를 배분 규칙으로 지역 x 카테고리에 나누고, 4주차→마감 변동으로 몬테카를로 달성 확률 계산
+SIMULATION_RULES = ('history', 'last', 'equal')
+SIMULATION_RATE_BINS = np.arange(0, 210, 10)   # 달성률(%) 히스토그램 구간, 마지막 칸은 200% 이상
+
+class SimulationInputs:
+    # 활성 지역 x 카테고리 기준 기간(월)별 최신 실적을 [신규, 해지] 배열로 정리
+    # period: 진행 중인 달 'YYYY-MM' (UTC, 월별 요약의 기간과 같은 기준), 그 이전 달들이 완료된 이력
+    def __init__(self, version, registry, rows, period):
+        self.version = version
+        self.period = period
+        self.regions, self.categories = registry.names('region'), registry.names('category')
+        self.region_ids = [registry.id_of('region', n) for n in self.regions]
+        self.category_ids = [registry.id_of('category', n) for n in self.categories]
+        shape = (2, len(self.regions), len(self.categories))
+        self.history, self.last_close, self.current_4w = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        self.mu, self.sigma = np.zeros(shape), np.full(shape, SIMULATION_DEFAULT_SIGMA)
+        self.periods = sorted({row[2] for row in rows})
+        if not rows or not self.regions or not self.categories: return
+
+        region_pos = np.full(max(self.region_ids + [r[0] for r in rows]) + 1, -1)
+        region_pos[self.region_ids] = np.arange(len(self.region_ids))
+        category_pos = np.full(max(self.category_ids + [r[1] for r in rows]) + 1, -1)
+        category_pos[self.category_ids] = np.arange(len(self.category_ids))
+        period_pos = {p: i for i, p in enumerate(self.periods)}
+        region_ids, category_ids, periods, _, *values = zip(*rows)
+        r, c = region_pos[np.array(region_ids)], category_pos[np.array(category_ids)]
+        p = np.array([period_pos[v] for v in periods])
+        values = np.nan_to_num(np.array(values, dtype=np.float64))   # new_4w, new_close, cancel_4w, cancel_close
+        four, close = values[[0, 2]], values[[1, 3]]
+        active = (r >= 0) & (c >= 0)
+
+        # 이번 달 실적은 현재 4주차 기준값(아직 입력이 없으면 0), 지난 달까지는 완료된 이력
+        # 직전 기간은 완료된 달 중 실적이 있는 가장 최근 달
+        completed_periods = [v for v in self.periods if v < period]
+        current = active & (p == period_pos.get(period, -1))
+        completed = active & (p < len(completed_periods))
+        last = active & (p == len(completed_periods) - 1)
+        for k in range(2):
+            self.current_4w[k][r[current], c[current]] = four[k][current]
+            self.last_close[k][r[last], c[last]] = close[k][last]
+            np.add.at(self.history[k], (r[completed], c[completed]), close[k][completed])
+
+            # 칸별 log(마감/4주차) 평균/표준편차, 관측이 2건 미만이면 전체 칸을 합친 값 사용
+            ok = completed & (four[k] > 0) & (close[k] > 0)
+            log_ratio = np.log(close[k][ok] / four[k][ok])
+            if len(log_ratio) == 0: continue
+            count, total, squares = np.zeros(shape[1:]), np.zeros(shape[1:]), np.zeros(shape[1:])
+            np.add.at(count, (r[ok], c[ok]), 1)
+            np.add.at(total, (r[ok], c[ok]), log_ratio)
+            np.add.at(squares, (r[ok], c[ok]), log_ratio ** 2)
+            pooled_mu = log_ratio.mean()
+            pooled_sigma = log_ratio.std(ddof=1) if len(log_ratio) > 1 else SIMULATION_DEFAULT_SIGMA
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mu = total / count
+                sigma = np.sqrt(np.maximum(squares - count * mu ** 2, 0) / (count - 1))
+            enough = count >= 2
+            self.mu[k] = np.where(enough, mu, pooled_mu)
+            self.sigma[k] = np.where(enough, sigma, pooled_sigma)
+
+    def weights(self, rule):
+        # 배분 가중치 [신규, 해지], 근거 실적이 없으면 균등 배분
+        base = {'history': self.history, 'last': self.last_close}.get(rule)
+        if base is None: return np.ones(self.history.shape), False
+        fallback = base.reshape(2, -1).sum(axis=1) <= 0
+        return np.where(fallback[:, None, None], 1.0, base), bool(fallback.any())
+
+_simulation_cache = {}
+_simulation_lock = threading.Lock()
+
+def get_simulation_inputs(conn, period=None):
+    # 데이터 버전과 기준 달이 같으면 월별 집계를 재사용 (목표/규칙만 바꿔 가며 반복 시뮬레이션)
+    db_name = _db_path(conn)
+    version = get_data_version(conn)
+    period = period or datetime.now(timezone.utc).strftime('%Y-%m')
+    with _simulation_lock:
+        cached = _simulation_cache.get(db_name)
+    if cached and cached.version == version and cached.period == period: return cached
+    inputs = SimulationInputs(version, get_registry(conn), conn.execute(SQL['simulation_history']).fetchall(), period)
+    with _simulation_lock:
+        _simulation_cache[db_name] = inputs
+    return inputs
+
+def allocate_targets(goal, weights):
+    # 최대 나머지 방식: 정수 목표로 나누되 합계가 정확히 goal 이 되도록 소수점이 큰 칸부터 1씩 보정
+    goal = int(round(goal))
+    flat = weights.ravel()
+    raw = goal * flat / flat.sum()
+    result = np.floor(raw)
+    short = goal - int(result.sum())
+    if short > 0: result[np.argsort(-(raw - result), kind='stable')[:short]] += 1
+    return result.reshape(weights.shape)
+
+def _simulate_chunk(task):
+    # 프로세스 풀 워커: (시나리오, [신규/해지], 지역, 카테고리) 한 번에 브로드캐스팅해 지역별 순증 마감 예측
+    seed, scenarios, mu, sigma, base = task
+    z = np.random.default_rng(seed).standard_normal((scenarios,) + base.shape)
+    close = base * np.exp(mu + sigma * z)
+    return (close[:, 0] - close[:, 1]).sum(axis=2)
+
+def simulate_close(inputs, scenarios, seed=None, executor=None):
+    seeds = np.random.SeedSequence(seed).spawn(-(-scenarios // SIMULATION_CHUNK))
+    tasks = [(s, min(SIMULATION_CHUNK, scenarios - i * SIMULATION_CHUNK), inputs.mu, inputs.sigma, inputs.current_4w)
+             for i, s in enumerate(seeds)]
+    mapper = executor.map if executor is not None and len(tasks) > 1 else map
+    return np.concatenate(list(mapper(_simulate_chunk, tasks)))
+
+def summarize_simulation(region_net, region_target, regions):
+    # 지역별 달성 확률, 달성률 분위수, 달성률 히스토그램 (+ 전사 합계)
+    region_net = np.column_stack([region_net, region_net.sum(axis=1)])
+    region_target = np.append(region_target, region_target.sum())
+    achieved = (region_net >= region_target).mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(region_target != 0, region_net / region_target * 100, np.nan)
+    quantiles = np.percentile(rate, [5, 25, 50, 75, 95], axis=0)
+    bins = np.clip(np.floor(np.nan_to_num(rate, nan=0) / 10), 0, len(SIMULATION_RATE_BINS) - 1).astype(np.int64)
+    counts = np.bincount((bins + np.arange(rate.shape[1]) * len(SIMULATION_RATE_BINS)).ravel(),
+                         minlength=rate.shape[1] * len(SIMULATION_RATE_BINS)).reshape(rate.shape[1], -1)
+    results = []
+    for i, name in enumerate(list(regions) + ['전체']):
+        has_rate = region_target[i] != 0
+        results.append({"region": name, "net_target": float(region_target[i]),
+                        "expected_net_close": round(float(region_net[:, i].mean()), 1),
+                        "probability": round(float(achieved[i]), 4),
+                        "rate_quantiles": {f"p{q}": round(float(v), 1) if has_rate else None
+                                           for q, v in zip((5, 25, 50, 75, 95), quantiles[:, i])},
+                        "histogram": counts[i].tolist() if has_rate else None})
+    return results
+
+def _simulation_params():
+    params = request.get_json(silent=True) or request.form
+    rule = params.get('rule') or 'history'
+    if rule not in SIMULATION_RULES: raise ValueError(f"rule 은 {', '.join(SIMULATION_RULES)} 중 하나여야 합니다.")
+    new_goal, cancel_goal = clean_num(params.get('new_goal')), clean_num(params.get('cancel_goal'))
+    if new_goal < 0 or cancel_goal < 0: raise ValueError("new_goal/cancel_goal 은 0 이상이어야 합니다.")
+    scenarios = int(params.get('scenarios') or SIMULATION_SCENARIOS)
+    if not 0 <= scenarios <= SIMULATION_MAX_SCENARIOS: raise ValueError(f"scenarios 는 0~{SIMULATION_MAX_SCENARIOS} 사이여야 합니다.")
+    seed = params.get('seed')
+    version = params.get('data_version')
+    return rule, new_goal, cancel_goal, scenarios, int(seed) if seed not in (None, '') else None, \
+        int(version) if version not in (None, '') else None
+
+def _allocation(inputs, rule, new_goal, cancel_goal):
+    weights, fallback = inputs.weights(rule)
+    return np.stack([allocate_targets(new_goal, weights[0]), allocate_targets(cancel_goal, weights[1])]), fallback
+
+@app.errorhandler(StaleData)
+def handle_stale_data(e):
+    return jsonify({"msg": "시뮬레이션 이후 데이터가 바뀌었습니다. 다시 시뮬레이션한 뒤 확정하세요.",
+                    "expected_version": e.expected, "data_version": e.actual}), 409
+
+@app.route('/api/simulate', methods=['POST'])
+@admission_limited('simulate')
+def simulate():
+    # 전사 신규/해지 목표 → 배분 규칙별 목표 행렬 + 마감 달성 확률 분포 (DB 는 바꾸지 않음)
+    started = time.perf_counter()
+    try:
+        rule, new_goal, cancel_goal, scenarios, seed, _ = _simulation_params()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    conn = db_connect()
+    inputs = get_simulation_inputs(conn)
+    conn.close()
+    if not inputs.regions or not inputs.categories: return jsonify({"msg": "활성 지역/카테고리가 없습니다."}), 400
+
+    targets, fallback = _allocation(inputs, rule, new_goal, cancel_goal)
+    result = {"rule": rule, "fallback_to_equal": fallback, "data_version": inputs.version,
+              "new_goal": int(targets[0].sum()), "cancel_goal": int(targets[1].sum()),
+              "targets": [{"region": region, "category": category, "new_target": int(targets[0, i, j]), "cancel_target": int(targets[1, i, j])}
+                          for i, region in enumerate(inputs.regions) for j, category in enumerate(inputs.categories)]}
+    if scenarios:
+        # 시나리오 수가 많을 때만 프로세스 풀 사용 (작은 계산은 워커 전송 비용이 더 큼)
+        draws = scenarios * inputs.current_4w.size
+        executor = get_report_pool() if draws >= SIMULATION_POOL_MIN_DRAWS else None
+        region_net = simulate_close(inputs, scenarios, seed, executor)
+        result["simulation"] = {"scenarios": scenarios, "seed": seed, "period": inputs.period, "periods": len(inputs.periods),
+                                "rate_bins": SIMULATION_RATE_BINS.tolist(),
+                                "regions": summarize_simulation(region_net, (targets[0] - targets[1]).sum(axis=1), inputs.regions)}
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return jsonify(result)
+
+@app.route('/api/simulate/commit', methods=['POST'])
+def commit_simulation():
+    # 검토한 시나리오(같은 규칙/목표/data_version)를 한 트랜잭션으로 targets 에 반영
+    try:
+        rule, new_goal, cancel_goal, _, _, expected = _simulation_params()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    if expected is None: return jsonify({"msg": "시뮬레이션 결과의 data_version 이 필요합니다."}), 400
+    conn = db_connect()
+    try:
+        inputs = get_simulation_inputs(conn)
+        if inputs.version != expected: raise StaleData(expected, inputs.version)
+        targets, _ = _allocation(inputs, rule, new_goal, cancel_goal)
+        rows = [(region_id, category_id, float(targets[0, i, j]), float(targets[1, i, j]))
+                for i, region_id in enumerate(inputs.region_ids) for j, category_id in enumerate(inputs.category_ids)]
+        # 배분 계산 이후 다른 쓰기가 있었으면 save_targets 가 StaleData 로 롤백
+        save_targets(conn, rows, expected_version=expected)
+    finally:
+        conn.close()
+    notify_replica()
+    return jsonify({"msg": f"{len(rows)}개 지역/카테고리 목표를 반영했습니다.", "rule": rule,
+                    "new_goal": int(targets[0].sum()), "cancel_goal": int(targets[1].sum())})
+
+@app.route('/api/backup', methods=['GET', 'POST'])
+def backup():
+    # GET: 보관 중인 백업 목록, POST: 즉시 온라인 백업
+    db_name = current_db()
+    if request.method == 'GET': return jsonify({"backups": list_backups(base=os.path.splitext(os.path.basename(db_name))[0])})
+    return jsonify(run_heavy('backup', lambda: backup_database(db_name, reason='manual'), key=(db_name,)))
 
 @app.route('/api/download_example_target')
 def download_example_target():
+    registry = get_registry()
     data = []
-    for r in REGIONS_ORDER:
-        for c in CATEGORIES_ORDER:
+    for r in registry.names('region'):
+        for c in registry.names('category'):
             data.append({"지역": r, "카테고리": c, "신규목표": 0, "해지목표": 0})
     
     example_df = pd.DataFrame(data)
@@ -928,4 +2807,21 @@ def download_example_target():
     return send_file(excel_file, download_name="목표_업로드_양식_예시.xlsx", as_attachment=True)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    multiprocessing.freeze_support()
+    # python app.py backup [DB 경로] | python app.py restore <백업파일> <새 DB 경로> | python app.py create-tenant <조직ID> | python app.py tenants
+    if len(sys.argv) > 1 and sys.argv[1] == 'backup':
+        print(backup_database(sys.argv[2] if len(sys.argv) > 2 else None, reason='manual'))
+    elif len(sys.argv) > 1 and sys.argv[1] == 'create-tenant':
+        path = tenant_db_path(sys.argv[2])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        init_db(path)
+        print(path)
+    elif len(sys.argv) > 1 and sys.argv[1] == 'tenants':
+        # 조직 목록은 운영자만 확인 (HTTP 로는 다른 조직 ID 를 노출하지 않음)
+        for path in tenant_db_files(): print(os.path.splitext(os.path.basename(path))[0])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'restore':
+        print(restore_backup(sys.argv[2], sys.argv[3]))
+    else:
+        app.debug = True
+        start_schedulers()
+        app.run(host='0.0.0.0', port=5001, debug=True)
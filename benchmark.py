@@ -0,0 +1,494 @@
+# 성능 벤치마크 스크립트
+#   python benchmark.py report --rows 200000
+#   python benchmark.py storage --rows 1000000
+#   python benchmark.py replica --writers 4
+#   python benchmark.py backup --rows 1000000
+#   python benchmark.py plans --rows 500000
+#   python benchmark.py tenants --tenants 24 --writers 8
+#   python benchmark.py simulate --scenarios 5000 20000 100000
+import argparse
+import os
+import random
+import re
+import shutil
+import sys
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import app
+
+# 벤치마크 중에는 백업/스냅샷 스케줄러가 임시 DB 를 건드리지 않게 함
+app.SCHEDULERS_ENABLED = False
+
+# 정수 키 이관 이전의 문자열 키 스키마
+LEGACY_SCHEMA = [
+    '''CREATE TABLE metadata (type TEXT, value TEXT, PRIMARY KEY(type, value))''',
+    '''CREATE TABLE targets (region TEXT, category TEXT, new_target REAL, cancel_target REAL, PRIMARY KEY(region, category))''',
+    '''CREATE TABLE actuals (id INTEGER PRIMARY KEY AUTOINCREMENT, region TEXT, category TEXT, 
+                             new_actual_4w REAL, new_actual_close REAL, cancel_actual_4w REAL, cancel_actual_close REAL, 
+                             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''',
+]
+
+# 대용량 합성 이력 DB 생성 (지역 x 카테고리 별 목표 + 무작위 실적 이력)
+def make_synthetic_db(path, rows, seed=42, legacy=False):
+    rng = random.Random(seed)
+    if legacy:
+        conn = sqlite3.connect(path)
+        for ddl in LEGACY_SCHEMA: conn.execute(ddl)
+        conn.executemany("INSERT INTO metadata VALUES (?, ?)",
+                         [(t, v) for t, values in app.DEFAULT_DIMENSIONS.items() for v in values])
+        conn.commit()
+        conn.close()
+    else:
+        app.init_db(path)
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT OR REPLACE INTO targets (region, category, new_target, cancel_target) VALUES (?, ?, ?, ?)",
+                     [(r, c, rng.randint(500, 5000), rng.randint(100, 1000)) for r in app.REGIONS_ORDER for c in app.CATEGORIES_ORDER])
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        ts = start + timedelta(seconds=i * 60)
+        batch.append((rng.choice(app.REGIONS_ORDER), rng.choice(app.CATEGORIES_ORDER),
+                      rng.randint(0, 5000), rng.randint(0, 6000), rng.randint(0, 1000), rng.randint(0, 1200),
+                      ts.strftime('%Y-%m-%d %H:%M:%S')))
+        if len(batch) >= 10000:
+            conn.executemany("INSERT INTO actuals (region, category, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO actuals (region, category, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+# 스키마 전/후 비교용 조회 (이전: 문자열 키 원본 SQL, 이후: 정수 키 SQL)
+STORAGE_QUERIES = {
+    'dashboard': (
+        '''SELECT t.region, (IFNULL(t.new_target, 0) - IFNULL(t.cancel_target, 0)) as net_target, 
+                  (SELECT (IFNULL(new_actual_close, 0) - IFNULL(cancel_actual_close, 0)) FROM actuals a WHERE a.region = t.region AND a.category = t.category ORDER BY timestamp DESC LIMIT 1) as net_actual_close
+           FROM targets t WHERE t.category=?''',
+        '''SELECT r.value as region, (IFNULL(t.new_target, 0) - IFNULL(t.cancel_target, 0)) as net_target, 
+                  (SELECT (IFNULL(new_actual_close, 0) - IFNULL(cancel_actual_close, 0)) FROM actuals_data a WHERE a.region_id = t.region_id AND a.category_id = t.category_id ORDER BY ts DESC, id DESC LIMIT 1) as net_actual_close
+           FROM targets_data t JOIN metadata r ON r.id = t.region_id WHERE t.category_id=(SELECT id FROM metadata WHERE type='category' AND value=?)''',
+        lambda: (app.CATEGORIES_ORDER[0],)),
+    'get_target': (
+        "SELECT new_target, cancel_target FROM targets WHERE region=? AND category=?",
+        '''SELECT new_target, cancel_target FROM targets_data WHERE region_id=(SELECT id FROM metadata WHERE type='region' AND value=?)
+                  AND category_id=(SELECT id FROM metadata WHERE type='category' AND value=?)''',
+        lambda: (app.REGIONS_ORDER[0], app.CATEGORIES_ORDER[0])),
+    'region_history': (
+        "SELECT * FROM actuals WHERE region=? AND category=? ORDER BY timestamp DESC LIMIT 100",
+        "SELECT * FROM actuals WHERE region=? AND category=? ORDER BY timestamp DESC LIMIT 100",
+        lambda: (app.REGIONS_ORDER[0], app.CATEGORIES_ORDER[0])),
+}
+
+def storage_stats(path):
+    conn = sqlite3.connect(path)
+    stats = {'file': os.path.getsize(path), 'table': 0, 'index': 0}
+    try:
+        kinds = dict(conn.execute("SELECT name, type FROM sqlite_master WHERE type IN ('table', 'index')").fetchall())
+        for name, size in conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"):
+            # WITHOUT ROWID 테이블/자동 PK 인덱스는 sqlite_master 상 이름으로 분류
+            stats['index' if kinds.get(name) == 'index' or name.startswith('sqlite_autoindex') else 'table'] += size
+    except sqlite3.OperationalError:
+        pass  # dbstat 미지원 빌드: 파일 크기만 보고
+    conn.close()
+    return stats
+
+def time_query(path, sql, params, repeat):
+    conn = sqlite3.connect(path)
+    conn.execute(sql, params).fetchall()  # 캐시 워밍업
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append(time.perf_counter() - t0)
+    conn.close()
+    return statistics.median(samples) * 1000
+
+def bench_storage(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        before, after = os.path.join(tmp, 'legacy.db'), os.path.join(tmp, 'compact.db')
+        make_synthetic_db(before, args.rows, legacy=True)
+        shutil.copy(before, after)
+        t0 = time.perf_counter()
+        app.init_db(after)
+        print(f"rows={args.rows:,}  migration={time.perf_counter() - t0:.2f}s")
+        conn = sqlite3.connect(after)
+        conn.execute("VACUUM")
+        conn.close()
+
+        b, a = storage_stats(before), storage_stats(after)
+        for key, label in (('file', 'DB 파일'), ('table', '테이블'), ('index', '인덱스')):
+            if b[key]: print(f"{label:<8} before={b[key] / 1e6:8.2f}MB  after={a[key] / 1e6:8.2f}MB  ratio={a[key] / b[key]:.2f}")
+        for name, (sql_before, sql_after, params) in STORAGE_QUERIES.items():
+            tb = time_query(before, sql_before, params(), args.repeat)
+            ta = time_query(after, sql_after, params(), args.repeat)
+            print(f"{name:<15} before={tb:8.3f}ms  after={ta:8.3f}ms")
+
+def write_storm(path, stop):
+    # 실적 입력이 몰리는 마감 직전 상황: 한 건씩 커밋
+    conn = sqlite3.connect(path, timeout=30)
+    while not stop.is_set():
+        conn.execute("INSERT INTO actuals (region, category, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close) VALUES (?, ?, 1, 1, 1, 1)",
+                     (random.choice(app.REGIONS_ORDER), random.choice(app.CATEGORIES_ORDER)))
+        conn.commit()
+    conn.close()
+
+def read_latencies(client, reads):
+    samples, errors = [], 0
+    for i in range(reads):
+        t0 = time.perf_counter()
+        res = client.get('/api/dashboard', query_string={'category': app.CATEGORIES_ORDER[i % len(app.CATEGORIES_ORDER)]})
+        samples.append((time.perf_counter() - t0) * 1000)
+        errors += res.status_code != 200
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1], errors
+
+def bench_replica(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        make_synthetic_db(path, args.rows)
+        app.DB_NAME = path
+        client = app.app.test_client()
+        for mode in (False, True):
+            app.READ_REPLICA, app._tenants = mode, None
+            idle = read_latencies(client, args.reads)
+            stop = threading.Event()
+            writers = [threading.Thread(target=write_storm, args=(path, stop)) for _ in range(args.writers)]
+            for w in writers: w.start()
+            storm = read_latencies(client, args.reads)
+            stop.set()
+            for w in writers: w.join()
+            label = 'replica' if mode else 'disk'
+            print(f"{label:<8} idle p50={idle[0]:.3f}ms p99={idle[1]:.3f}ms | "
+                  f"storm({args.writers} writers) p50={storm[0]:.3f}ms p99={storm[1]:.3f}ms errors={storm[2]}")
+
+def timed_writes(path, stop, samples):
+    conn = sqlite3.connect(path, timeout=30)
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        conn.execute("INSERT INTO actuals_data (region_id, category_id, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close) VALUES (1, 1, 1, 1, 1, 1)")
+        conn.commit()
+        samples.append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.001)
+    conn.close()
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1], samples[-1]
+
+def bench_backup(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        make_synthetic_db(path, args.rows)
+        app.BACKUP_PAGES_PER_STEP = args.pages
+
+        # 백업 없이 쓰기 지연 기준선
+        stop, baseline = threading.Event(), []
+        writer = threading.Thread(target=timed_writes, args=(path, stop, baseline))
+        writer.start()
+        time.sleep(args.seconds)
+        stop.set()
+        writer.join()
+
+        # 백업과 동시에 쓰기
+        stop, during = threading.Event(), []
+        writer = threading.Thread(target=timed_writes, args=(path, stop, during))
+        writer.start()
+        result = app.backup_database(path, os.path.join(tmp, 'backups'), reason='bench')
+        stop.set()
+        writer.join()
+
+        print(f"db={result['bytes'] / 1e6:.1f}MB  gz={result['compressed_bytes'] / 1e6:.1f}MB  pages/step={args.pages}  "
+              f"steps={result['steps']}  restarts={result['restarts']}")
+        print(f"backup copy={result['copy_seconds']:.2f}s ({result['mb_per_second']}MB/s)  total(with gzip)={result['seconds']:.2f}s")
+        for label, samples in (('idle', baseline), ('backup', during)):
+            p50, p99, worst = _percentiles(samples)
+            print(f"write latency [{label:<6}] n={len(samples):<5} p50={p50:.3f}ms p99={p99:.3f}ms max={worst:.3f}ms")
+
+def bench_report(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        make_synthetic_db(path, args.rows)
+        conn = sqlite3.connect(path)
+        t0 = time.perf_counter()
+        data = app.load_pack_data(conn)
+        conn.close()
+        print(f"rows={args.rows:,}  query+encode={time.perf_counter() - t0:.3f}s")
+
+        max_workers = args.max_workers or os.cpu_count()
+        base = None
+        for workers in range(1, max_workers + 1):
+            if workers == 1:
+                t0 = time.perf_counter()
+                content = app.render_meeting_pack(data)
+                elapsed = time.perf_counter() - t0
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    app.render_meeting_pack(data, executor=pool)  # 워커 기동 비용 제외
+                    t0 = time.perf_counter()
+                    content = app.render_meeting_pack(data, executor=pool)
+                    elapsed = time.perf_counter() - t0
+            base = base or elapsed
+            print(f"workers={workers:<3} render={elapsed:.3f}s  speedup={base / elapsed:.2f}x  size={len(content) / 1024:.0f}KB")
+
+def tenant_writes(client, tenant, stop, samples):
+    # 조직 경로로 실적을 한 건씩 입력 (요청마다 커밋)
+    form = {'region': app.REGIONS_ORDER[0], 'category': app.CATEGORIES_ORDER[0], 'new_actual_4w': '1',
+            'new_actual_close': '1', 'cancel_actual_4w': '0', 'cancel_actual_close': '0'}
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        res = client.post(f'/t/{tenant}/submit_actual', data=form)
+        samples.append(((time.perf_counter() - t0) * 1000, res.status_code == 200))
+
+def bench_tenants(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app.TENANT_DIR = tmp
+        app.TENANT_CACHE_SIZE, app._tenants = max(args.tenants, args.writers) + 1, None
+        names = [f"org{i:02d}" for i in range(args.tenants)]
+        seed = os.path.join(tmp, 'seed.db')
+        make_synthetic_db(seed, args.rows)
+        for name in names: shutil.copy(seed, app.tenant_db_path(name))
+
+        # 처음 접근 시 조직별 지연 초기화(스키마 확인) 비용과 이후 조회 비용
+        client = app.app.test_client()
+        t0 = time.perf_counter()
+        for name in names: client.get(f'/t/{name}/api/metadata')
+        first = (time.perf_counter() - t0) / len(names) * 1000
+        t0 = time.perf_counter()
+        for name in names: client.get(f'/t/{name}/api/metadata')
+        warm = (time.perf_counter() - t0) / len(names) * 1000
+        print(f"tenants={args.tenants}  first access={first:.2f}ms/tenant  cached={warm:.3f}ms/tenant  "
+              f"cached tenants={len(app.get_tenants().stats())}")
+
+        # 같은 수의 쓰기 스레드를 한 조직에 몰았을 때 vs 조직별로 나눴을 때
+        for label, targets in (('shared', [names[0]] * args.writers),
+                               ('sharded', [names[i % len(names)] for i in range(args.writers)])):
+            stop, samples = threading.Event(), [[] for _ in targets]
+            threads = [threading.Thread(target=tenant_writes, args=(app.app.test_client(), t, stop, out))
+                       for t, out in zip(targets, samples)]
+            for t in threads: t.start()
+            time.sleep(args.seconds)
+            stop.set()
+            for t in threads: t.join()
+            flat = [ms for out in samples for ms, _ in out]
+            errors = sum(not ok for out in samples for _, ok in out)
+            p50, p99, worst = _percentiles(flat)
+            print(f"{label:<8} writers={args.writers}  writes/s={len(flat) / args.seconds:8.1f}  "
+                  f"p50={p50:.3f}ms p99={p99:.3f}ms max={worst:.3f}ms errors={errors}")
+
+# app.SQL 의 모든 문장에 대한 실행 계획/시간 기대치
+#   uses: EXPLAIN QUERY PLAN 에 반드시 나와야 하는 문구, plan: 계획 전체가 정확히 이와 같아야 함 (쓰기 문장)
+#   hot: 요청마다 실행되는 경로 → scans 에 적은 테이블(별칭) 외에는 전체 스캔 금지, actuals_data 는 항상 금지
+#   budget_ms: 합성 DB 에서 측정한 중앙값 상한 (--budget-scale 로 장비별 보정)
+PLAN_EXPECTATIONS = {
+    'data_version': dict(uses=['SEARCH data_version USING INTEGER PRIMARY KEY'], hot=True, budget_ms=1,
+                         params=lambda ids: ()),
+    'metadata_version': dict(uses=['SEARCH metadata_version USING INTEGER PRIMARY KEY'], hot=True, budget_ms=1,
+                             params=lambda ids: ()),
+    'targets_version': dict(uses=['SEARCH targets_version USING INTEGER PRIMARY KEY'], hot=True, budget_ms=1,
+                            params=lambda ids: ()),
+    'migration_tables': dict(uses=['SCAN sqlite_master'], scans=['sqlite_master'], hot=True, budget_ms=1,
+                             params=lambda ids: ()),
+    'migration_without_rowid': dict(uses=['SCAN pragma_table_list VIRTUAL TABLE'], scans=['pragma_table_list'], hot=True,
+                                    budget_ms=1, params=lambda ids: ('snapshot_artifacts',)),
+    'migration_columns': dict(uses=['SCAN pragma_table_info VIRTUAL TABLE'], scans=['pragma_table_info'], hot=True,
+                              budget_ms=1, params=lambda ids: ('metadata',)),
+    # 지역/카테고리 수만큼의 작은 테이블을 정렬 순서대로 한 번 읽음
+    'registry': dict(uses=['SCAN metadata USING INDEX sqlite_autoindex_metadata_1'], scans=['metadata'], hot=True,
+                     budget_ms=2, params=lambda ids: ()),
+    # 목표 행렬 적재: 지역 x 카테고리 크기의 작은 테이블 전체
+    'targets': dict(uses=['SCAN targets_data'], scans=['targets_data'], hot=True, budget_ms=2, params=lambda ids: ()),
+    'dashboard_actuals': dict(uses=['SEARCH r USING COVERING INDEX sqlite_autoindex_metadata_1 (type=?)',
+                                    'USING INDEX idx_actuals_dim_ts (region_id=? AND category_id=?)'],
+                              hot=True, budget_ms=5, params=lambda ids: (ids['category'],)),
+    'replica_last_id': dict(uses=['SEARCH actuals_data'], hot=True, budget_ms=1, params=lambda ids: ()),
+    'replica_latest': dict(uses=['SEARCH r USING COVERING INDEX sqlite_autoindex_metadata_1 (type=?)',
+                                 'SEARCH a USING INTEGER PRIMARY KEY', 'idx_actuals_dim_ts (region_id=? AND category_id=?)'],
+                           hot=True, budget_ms=10, params=lambda ids: ()),
+    'replica_since': dict(uses=['SEARCH actuals_data USING INTEGER PRIMARY KEY (rowid>?)'], hot=True, budget_ms=2,
+                          params=lambda ids: (ids['last_id'] - 100,)),
+    # 키를 미리 정수로 바꿔 넘기므로 쓰기 문장 자체에는 조회가 없어야 함
+    'save_target': dict(uses=[], plan=[], hot=True, budget_ms=2,
+                        params=lambda ids: (ids['region'], ids['category'], 1000, 100)),
+    'save_actual': dict(uses=[], plan=[], hot=True, budget_ms=2,
+                        params=lambda ids: (ids['region'], ids['category'], 10, 20, 1, 2)),
+    'save_metadata': dict(uses=['SCALAR SUBQUERY', 'SEARCH metadata'], hot=True, budget_ms=2,
+                          params=lambda ids: {'type': 'region', 'value': '계획점검', 'sort_order': None, 'active': 1}),
+    'download': dict(uses=[], hot=False, budget_ms=3000, params=lambda ids: ()),
+    'pack': dict(uses=[], hot=False, budget_ms=3000, params=lambda ids: ()),
+    'snapshot_find': dict(uses=['sqlite_autoindex_snapshots_1'], hot=True, budget_ms=1, params=lambda ids: ('plans', '2024-01')),
+    'snapshot_create': dict(uses=[], hot=True, budget_ms=2, params=lambda ids: ('plans', '2024-02', 0, 0, 0)),
+    'snapshot_freeze': dict(uses=['SEARCH t USING PRIMARY KEY', 'idx_actuals_dim_ts (region_id=? AND category_id=?)'], hot=True,
+                            budget_ms=20, params=lambda ids: (ids['snapshot'] + 1,)),
+    # 체크포인트마다 한 번: 내보내기용 실적 이력 전체 복사 (이관 시 백필도 한 번)
+    'snapshot_freeze_actuals': dict(uses=[], hot=False, budget_ms=3000, params=lambda ids: (ids['snapshot'] + 1,)),
+    'snapshot_backfill_actuals': dict(uses=[], hot=False, budget_ms=3000, params=lambda ids: ()),
+    'snapshot_active': dict(uses=['idx_snapshots_checkpoint'], hot=True, budget_ms=1, params=lambda ids: (2 ** 40, 0)),
+    'snapshot_get': dict(uses=['SEARCH snapshots USING INTEGER PRIMARY KEY'], hot=True, budget_ms=1, params=lambda ids: (ids['snapshot'],)),
+    'snapshot_list': dict(uses=['SCAN snapshots USING INDEX idx_snapshots_checkpoint', 'SEARCH snapshot_rows USING PRIMARY KEY (snapshot_id=?)'],
+                          scans=['snapshots'], hot=True, budget_ms=5, params=lambda ids: ()),
+    'snapshot_rows': dict(uses=['SEARCH snapshot_rows USING PRIMARY KEY (snapshot_id=?)'], hot=True, budget_ms=2,
+                          params=lambda ids: (ids['snapshot'],)),
+    'snapshot_actuals': dict(uses=['SEARCH snapshot_actuals USING PRIMARY KEY (snapshot_id=?)'], hot=False, budget_ms=3000,
+                             params=lambda ids: (ids['snapshot'],)),
+    # 요청마다 읽는 대시보드 결과물 한 건 (내보내기 blob 은 이력 크기에 비례하는 복사 비용이라 예산 대상 아님)
+    'snapshot_artifact': dict(uses=['SEARCH snapshot_artifacts USING INDEX sqlite_autoindex_snapshot_artifacts_1'], hot=True, budget_ms=2,
+                              params=lambda ids: (ids['snapshot'], f"dashboard/{app.CATEGORIES_ORDER[0]}")),
+    'snapshot_artifact_save': dict(uses=[], hot=True, budget_ms=2, params=lambda ids: (ids['snapshot'], 'plans', b'')),
+    'simulation_history': dict(uses=['SCAN actuals_monthly'], scans=['actuals_monthly'], hot=True, budget_ms=20, params=lambda ids: ()),
+    'simulation_backfill': dict(uses=[], hot=False, budget_ms=3000, params=lambda ids: ()),
+    'history_range': dict(uses=['SEARCH actuals_data USING INDEX idx_actuals_dim_ts (region_id=? AND category_id=? AND ts>? AND ts<?)'],
+                          hot=True, budget_ms=50, params=lambda ids: (ids['region'], ids['category'], 0, 2 ** 62)),
+    'history_page': dict(uses=['SEARCH actuals_data USING INDEX idx_actuals_dim_ts (region_id=? AND category_id=? AND ts>? AND ts<?)'],
+                         hot=True, budget_ms=5, params=lambda ids: (ids['region'], ids['category'], 0, 2 ** 62, -1, -1, 501)),
+}
+
+_SQL_KEYWORDS = {'WHERE', 'JOIN', 'LEFT', 'INNER', 'ON', 'ORDER', 'GROUP', 'LIMIT', 'VALUES', 'SET', 'USING'}
+
+def actuals_aliases(sql):
+    # 계획에는 별칭으로 찍히므로 SQL 에서 actuals_data/actuals 의 별칭을 모아 둠
+    names = {'actuals_data', 'actuals'}
+    for m in re.finditer(r'\b(?:actuals_data|actuals)\s+(?:AS\s+)?(\w+)', sql, re.IGNORECASE):
+        if m.group(1).upper() not in _SQL_KEYWORDS: names.add(m.group(1))
+    return names
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+def check_plan(name, sql, plan, expectation):
+    problems = [f"계획에 '{want}' 없음" for want in expectation['uses'] if not any(want in line for line in plan)]
+    if 'plan' in expectation and plan != expectation['plan']:
+        problems.append(f"계획이 기대와 다름: {plan} != {expectation['plan']}")
+    if expectation['hot']:
+        allowed = set(expectation.get('scans', [])) - actuals_aliases(sql)
+        problems += [f"핫 경로 전체 스캔: {line}" for line in plan
+                     if line.startswith('SCAN ') and line.split()[1] not in allowed]
+    return problems
+
+def time_statement(conn, sql, params, repeat):
+    # 쓰기 문장도 같은 DB 로 재현되도록 매 회 롤백
+    samples = []
+    for _ in range(repeat + 1):
+        conn.execute("BEGIN")
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append(time.perf_counter() - t0)
+        conn.rollback()
+    return statistics.median(samples[1:]) * 1000
+
+def expectation_problems():
+    # app.SQL 과 PLAN_EXPECTATIONS 가 서로 빠짐없이 대응하는지
+    failures = [f"{name}: 기대치 없음 (PLAN_EXPECTATIONS 에 추가 필요)" for name in sorted(set(app.SQL) - set(PLAN_EXPECTATIONS))]
+    failures += [f"{name}: app.SQL 에 없는 기대치" for name in sorted(set(PLAN_EXPECTATIONS) - set(app.SQL))]
+    return failures
+
+def plan_ids(conn, path):
+    registry = app.get_registry(conn, path)
+    return {'region': registry.id_of('region', app.REGIONS_ORDER[0]),
+            'category': registry.id_of('category', app.CATEGORIES_ORDER[0]),
+            'last_id': conn.execute("SELECT MAX(id) FROM actuals_data").fetchone()[0],
+            'snapshot': conn.execute("SELECT MAX(id) FROM snapshots").fetchone()[0]}
+
+def check_statement(conn, name, ids, repeat=5, budget_scale=1.0):
+    # (계획, 측정 시간, 예산, 위반 목록) — pytest(tests/test_query_plans.py)와 plans 명령이 같이 사용
+    sql, expectation = app.SQL[name], PLAN_EXPECTATIONS[name]
+    params = expectation['params'](ids)
+    plan = query_plan(conn, sql, params)
+    problems = check_plan(name, sql, plan, expectation)
+    elapsed = time_statement(conn, sql, params, repeat)
+    budget = expectation['budget_ms'] * budget_scale
+    if elapsed > budget: problems.append(f"실행 시간 {elapsed:.3f}ms > 예산 {budget:.3f}ms")
+    return plan, elapsed, budget, problems
+
+def bench_plans(args):
+    failures = expectation_problems()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'plans.db')
+        make_synthetic_db(path, args.rows)
+        snapshot_id = app.freeze_snapshot(path, 'plans', '2024-01', 0)
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute("ANALYZE")
+        ids = plan_ids(conn, path)
+        print(f"rows={args.rows:,}  statements={len(app.SQL)}")
+        for name in app.SQL:
+            if name not in PLAN_EXPECTATIONS: continue
+            plan, elapsed, budget, problems = check_statement(conn, name, ids, args.repeat, args.budget_scale)
+            print(f"{'FAIL' if problems else 'ok':<4} {name:<16} {elapsed:9.3f}ms / {budget:g}ms  " + " | ".join(plan))
+            failures += [f"{name}: {p}" for p in problems]
+        conn.close()
+    for failure in failures: print(f"  - {failure}")
+    if failures: sys.exit(1)
+
+def bench_simulate(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'simulate.db')
+        make_synthetic_db(path, args.rows)
+        conn = sqlite3.connect(path)
+        # 합성 이력은 과거 날짜이므로 마지막 달을 진행 중인 달로 간주
+        period = conn.execute("SELECT strftime('%Y-%m', MAX(ts), 'unixepoch') FROM actuals_data").fetchone()[0]
+        t0 = time.perf_counter()
+        inputs = app.get_simulation_inputs(conn, period)
+        conn.close()
+        print(f"rows={args.rows:,}  period={period}  periods={len(inputs.periods)}  cells={inputs.current_4w.size}  "
+              f"history load={time.perf_counter() - t0:.3f}s")
+        t0 = time.perf_counter()
+        targets, _ = app._allocation(inputs, 'history', args.new_goal, args.cancel_goal)
+        print(f"allocate={1000 * (time.perf_counter() - t0):.2f}ms")
+        region_target = (targets[0] - targets[1]).sum(axis=1)
+        with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count()) as pool:
+            app.simulate_close(inputs, 2 * app.SIMULATION_CHUNK, executor=pool)  # 워커 기동 비용 제외
+            for scenarios in args.scenarios:
+                line = f"scenarios={scenarios:<7}"
+                for label, executor in (('serial', None), ('pool', pool)):
+                    t0 = time.perf_counter()
+                    region_net = app.simulate_close(inputs, scenarios, seed=1, executor=executor)
+                    regions = app.summarize_simulation(region_net, region_target, inputs.regions)
+                    line += f"  {label}={1000 * (time.perf_counter() - t0):8.1f}ms"
+                print(line + f"  P(전체 달성)={regions[-1]['probability']:.3f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sales Performance Explorer 벤치마크')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('report', help='회의자료 팩 병렬 렌더링 (코어 수별 확장성)')
+    p.add_argument('--rows', type=int, default=200000)
+    p.add_argument('--max-workers', type=int, default=None)
+    p.set_defaults(func=bench_report)
+    p = sub.add_parser('storage', help='문자열 키 → 정수 키 스키마 이관 전/후 크기와 조회 지연')
+    p.add_argument('--rows', type=int, default=1000000)
+    p.add_argument('--repeat', type=int, default=20)
+    p.set_defaults(func=bench_storage)
+    p = sub.add_parser('replica', help='쓰기 폭주 중 대시보드 조회 지연 (디스크 vs 인메모리 복제본)')
+    p.add_argument('--rows', type=int, default=200000)
+    p.add_argument('--reads', type=int, default=500)
+    p.add_argument('--writers', type=int, default=4)
+    p.set_defaults(func=bench_replica)
+    p = sub.add_parser('backup', help='온라인 백업 처리량과 동시 쓰기 지연 영향')
+    p.add_argument('--rows', type=int, default=1000000)
+    p.add_argument('--pages', type=int, default=256)
+    p.add_argument('--seconds', type=float, default=2.0)
+    p.set_defaults(func=bench_backup)
+    p = sub.add_parser('plans', help='app.SQL 전체 실행 계획(인덱스 사용)과 실행 시간 예산 점검, 위반 시 종료 코드 1')
+    p.add_argument('--rows', type=int, default=500000)
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--budget-scale', type=float, default=1.0)
+    p.set_defaults(func=bench_plans)
+    p = sub.add_parser('tenants', help='조직별 DB 분리: 지연 초기화 비용과 쓰기 잠금 경합 (한 조직 vs 조직별)')
+    p.add_argument('--tenants', type=int, default=24)
+    p.add_argument('--writers', type=int, default=8)
+    p.add_argument('--rows', type=int, default=20000)
+    p.add_argument('--seconds', type=float, default=3.0)
+    p.set_defaults(func=bench_tenants)
+    p = sub.add_parser('simulate', help='목표 배분 몬테카를로 시뮬레이션: 시나리오 수별 직렬 vs 프로세스 풀 시간')
+    p.add_argument('--rows', type=int, default=200000)
+    p.add_argument('--scenarios', type=int, nargs='+', default=[1000, 5000, 20000, 100000])
+    p.add_argument('--new-goal', type=float, default=60000)
+    p.add_argument('--cancel-goal', type=float, default=12000)
+    p.add_argument('--workers', type=int, default=None)
+    p.set_defaults(func=bench_simulate)
+    args = parser.parse_args()
+    args.func(args)
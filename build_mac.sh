@@ -2,7 +2,7 @@
 echo "Building SalesExplorer for macOS..."
 
 # Install dependencies if not present
-pip install pyinstaller pandas openpyxl flask
+pip install pyinstaller pandas numpy openpyxl flask
 
 # Clean previous builds
 rm -rf build dist
@@ -2,7 +2,7 @@
 echo Building SalesExplorer for Windows...
 
 rem Install dependencies
-pip install pyinstaller pandas openpyxl flask
+pip install pyinstaller pandas numpy openpyxl flask
 
 rem Clean previous builds
 if exist build rd /s /q build
@@ -9,6 +9,7 @@ a = Analysis(
     datas=[],
     hiddenimports=[
         'pandas',
+        'numpy',
         'openpyxl',
         'sqlite3',
         'flask',
@@ -0,0 +1,57 @@
+# 테스트 공통 설정
+# app 은 import 시점에 작업 디렉터리의 DB_NAME 을 초기화하므로, 저장소의 forecast_v4.db 를 건드리지 않도록 임시 디렉터리에서 import
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix='forecast_tests_'))
+
+import app as app_module  # noqa: E402
+
+# 테스트 중에는 백업 스케줄러를 띄우지 않음
+app_module.SCHEDULERS_ENABLED = False
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # 테스트마다 새 DB (캐시는 DB 경로별이므로 서로 섞이지 않음)
+    path = str(tmp_path / 'test.db')
+    app_module.init_db(path)
+    monkeypatch.setattr(app_module, 'DB_NAME', path)
+    # 조직 캐시/조직 DB 위치도 테스트마다 새로
+    monkeypatch.setattr(app_module, 'TENANT_DIR', str(tmp_path / 'tenants'))
+    monkeypatch.setattr(app_module, '_tenants', None)
+    return path
+
+
+@pytest.fixture
+def client(db_path):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def add_actual(db_path):
+    # 기존 컬럼(region, category, timestamp) 기준 입력 (스키마가 바뀌어도 같은 SQL 로 동작해야 함)
+    def add(region, category, values=(10, 20, 1, 2), timestamp='2024-01-01 09:00:00', path=None):
+        conn = sqlite3.connect(path or db_path)
+        conn.execute("""INSERT INTO actuals (region, category, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)""", (region, category, *values, timestamp))
+        conn.commit()
+        conn.close()
+    return add
+
+
+@pytest.fixture
+def add_target(db_path):
+    def add(region, category, new_target, cancel_target, path=None):
+        conn = sqlite3.connect(path or db_path)
+        conn.execute("INSERT OR REPLACE INTO targets (region, category, new_target, cancel_target) VALUES (?, ?, ?, ?)",
+                     (region, category, new_target, cancel_target))
+        conn.commit()
+        conn.close()
+    return add
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+import app
+
+
+# 컨트롤러는 조직별로 보관되므로 조직 캐시를 새로 만드는 db_path 만으로 테스트마다 초기화됨
+pytestmark = pytest.mark.usefixtures('db_path')
+
+
+def test_slot_rejects_beyond_limit_and_queue():
+    controller = app.AdmissionController('test', 1, 0, 0.01)
+    with controller.slot():
+        with pytest.raises(app.Overloaded) as exc:
+            with controller.slot(): pass
+    assert exc.value.retry_after >= 1
+    with controller.slot(): pass
+    assert controller.stats()['admitted'] == 2 and controller.stats()['rejected'] == 1
+
+
+def test_queued_request_times_out():
+    controller = app.AdmissionController('test', 1, 1, 0.05)
+    with controller.slot():
+        with pytest.raises(app.Overloaded):
+            with controller.slot(): pass
+    assert controller.stats()['waiting'] == 0
+
+
+def test_overloaded_route_returns_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setitem(app.ADMISSION_LIMITS, 'download_pack', (1, 0, 0.01))
+    with app.get_admission('download_pack').slot():
+        response = client.get('/download_pack')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['endpoint'] == 'download_pack'
+
+
+def test_identical_requests_are_coalesced():
+    calls, release = [], threading.Event()
+    def build():
+        calls.append(1)
+        release.wait(5)
+        return b'content'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(app.run_heavy('download', build, key=('db', 1))))
+               for _ in range(4)]
+    for t in threads: t.start()
+    deadline = time.time() + 5
+    while not calls and time.time() < deadline: time.sleep(0.01)
+    time.sleep(0.05)
+    release.set()
+    for t in threads: t.join(5)
+
+    assert results == [b'content'] * 4 and len(calls) == 1
+    assert app.get_admission('download').stats()['coalesced'] == 3
+
+
+def test_leader_error_is_shared_and_not_cached():
+    def fail(): raise RuntimeError('boom')
+    with pytest.raises(RuntimeError):
+        app.run_heavy('download', fail, key=('db', 1))
+    assert app.run_heavy('download', lambda: b'ok', key=('db', 1)) == b'ok'
+
+
+def test_admission_stats_endpoint(client):
+    stats = client.get('/api/admission').get_json()
+    assert set(stats) == set(app.ADMISSION_LIMITS)
+    assert stats['download']['limit'] == app.ADMISSION_LIMITS['download'][0]
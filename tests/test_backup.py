@@ -0,0 +1,91 @@
+import gzip
+import os
+import sqlite3
+
+import pytest
+
+import app
+from test_compact_storage import make_legacy_db
+
+REGION, CATEGORY = app.REGIONS_ORDER[0], app.CATEGORIES_ORDER[0]
+
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / 'backups')
+    monkeypatch.setattr(app, 'BACKUP_DIR', path)
+    return path
+
+
+def actual_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT id, region, category, new_actual_close, timestamp FROM actuals ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_backup_and_restore_round_trip(db_path, backup_dir, add_actual, tmp_path):
+    for day in range(1, 4): add_actual(REGION, CATEGORY, (1, day, 0, 0), f'2024-01-0{day} 09:00:00')
+    result = app.backup_database(reason='manual')
+    assert result['file'].endswith('_manual.db.gz') and os.path.exists(result['file'])
+    assert not [n for n in os.listdir(backup_dir) if n.endswith('.tmp')]
+
+    restored = str(tmp_path / 'restored.db')
+    app.restore_backup(result['file'], restored)
+    assert actual_rows(restored) == actual_rows(db_path)
+    # 기존 파일은 덮어쓰지 않음
+    with pytest.raises(FileExistsError):
+        app.restore_backup(result['file'], restored)
+
+
+def test_restore_rejects_corrupt_backup(backup_dir, tmp_path):
+    os.makedirs(backup_dir)
+    bad = os.path.join(backup_dir, 'bad.db.gz')
+    with gzip.open(bad, 'wb') as f: f.write(b'SQLite format 3\x00' + b'\x00' * 4000)
+    with pytest.raises(sqlite3.DatabaseError):
+        app.restore_backup(bad, str(tmp_path / 'restored.db'))
+    assert not os.path.exists(str(tmp_path / 'restored.db'))
+
+
+def test_rotation_keeps_latest(db_path, backup_dir, monkeypatch):
+    monkeypatch.setattr(app, 'BACKUP_KEEP', 2)
+    files = [app.backup_database()['file'] for _ in range(4)]
+    assert sorted(app.list_backups()) == sorted(os.path.basename(f) for f in files[-2:])
+
+
+def test_backup_route(client, backup_dir):
+    created = client.post('/api/backup').get_json()
+    assert os.path.basename(created['file']) in client.get('/api/backup').get_json()['backups']
+
+
+def test_migration_takes_backup_first(tmp_path, backup_dir):
+    path = str(tmp_path / 'legacy.db')
+    make_legacy_db(path)
+    app.init_db(path)
+    names = os.listdir(backup_dir)
+    assert len(names) == 1 and names[0].startswith('legacy_') and names[0].endswith('_premigration.db.gz')
+
+    # 백업본은 이관 전 스키마 그대로
+    restored = str(tmp_path / 'restored.db')
+    app.restore_backup(os.path.join(backup_dir, names[0]), restored)
+    conn = sqlite3.connect(restored)
+    assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'actuals'").fetchone() == ('table',)
+    conn.close()
+
+    # 이미 이관된 DB 는 다시 백업하지 않음
+    app.init_db(path)
+    assert len(os.listdir(backup_dir)) == 1
+
+
+def test_schedulers_start_once_and_respect_flag(monkeypatch):
+    started = []
+    monkeypatch.setattr(app, 'start_backup_scheduler', lambda: started.append(1))
+    monkeypatch.setattr(app, '_schedulers_started', False)
+    app.start_schedulers()
+    assert started == []
+
+    monkeypatch.setattr(app, 'SCHEDULERS_ENABLED', True)
+    app.start_schedulers()
+    app.start_schedulers()
+    assert started == [1]
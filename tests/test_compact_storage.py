@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+import app
+import benchmark
+
+REGION, CATEGORY = app.REGIONS_ORDER[0], app.CATEGORIES_ORDER[0]
+
+
+def make_legacy_db(path):
+    # 정수 키 이관 이전의 스키마 + 데이터 (목록 밖 지역, 지역 미지정 실적 포함)
+    conn = sqlite3.connect(path)
+    for ddl in benchmark.LEGACY_SCHEMA: conn.execute(ddl)
+    conn.executemany("INSERT INTO metadata VALUES (?, ?)",
+                     [(t, v) for t, values in app.DEFAULT_DIMENSIONS.items() for v in values])
+    conn.executemany("INSERT INTO targets VALUES (?, ?, ?, ?)",
+                     [(REGION, CATEGORY, 100, 10), ('폐지지역', CATEGORY, 50, 5)])
+    conn.executemany("""INSERT INTO actuals (id, region, category, new_actual_4w, new_actual_close, cancel_actual_4w, cancel_actual_close, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                     [(3, REGION, CATEGORY, 10, 20, 1, 2, '2024-01-01 09:00:00'),
+                      (7, '폐지지역', CATEGORY, 5, 6, 0, 1, '2024-01-02 10:30:00'),
+                      (9, None, CATEGORY, 1, 1, 0, 0, '2024-01-03 11:00:00')])
+    conn.commit()
+    conn.close()
+
+
+def rows(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_populated_legacy_db_is_migrated(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    make_legacy_db(path)
+    app.init_db(path)
+
+    tables = {r[0] for r in rows(path, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'actuals_data', 'targets_data'} <= tables and not {'actuals', 'targets', 'metadata_old'} & tables
+    # 호환 뷰로 기존 값/id/시각이 그대로 보임
+    assert rows(path, "SELECT id, region, category, new_actual_close, timestamp FROM actuals ORDER BY id") == [
+        (3, REGION, CATEGORY, 20, '2024-01-01 09:00:00'),
+        (7, '폐지지역', CATEGORY, 6, '2024-01-02 10:30:00'),
+        (9, '(미지정)', CATEGORY, 1, '2024-01-03 11:00:00')]
+    assert dict(rows(path, "SELECT region, new_target FROM targets")) == {REGION: 100, '폐지지역': 50}
+    # 처음 보는 값은 비활성 항목으로 등록
+    assert rows(path, "SELECT value, active FROM metadata WHERE type = 'region' AND value IN ('폐지지역', '(미지정)') ORDER BY value") == [
+        ('(미지정)', 0), ('폐지지역', 0)]
+
+    # 두 번째 실행은 아무것도 바꾸지 않음
+    app.init_db(path)
+    assert len(rows(path, "SELECT id FROM actuals")) == 3
+
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+    path = str(tmp_path / 'legacy.db')
+    make_legacy_db(path)
+
+    def fail(c): raise sqlite3.OperationalError('boom')
+    monkeypatch.setattr(app, '_migrate_compact_storage', fail)
+    with pytest.raises(sqlite3.OperationalError):
+        app.init_db(path)
+
+    # metadata 이관까지 포함해 전부 되돌려져 원래 스키마 그대로
+    tables = {r[0] for r in rows(path, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'metadata', 'actuals', 'targets'} <= tables and 'metadata_old' not in tables
+    assert [r[1] for r in rows(path, "PRAGMA table_info(metadata)")] == ['type', 'value']
+    assert len(rows(path, "SELECT id FROM actuals")) == 3
+
+
+def test_view_writes_keep_metadata_ids(db_path, add_target, add_actual):
+    before = rows(db_path, "SELECT id, value FROM metadata ORDER BY id")
+    add_target(REGION, CATEGORY, 100, 10)
+    add_target(REGION, CATEGORY, 200, 20)
+    add_actual(REGION, CATEGORY)
+    assert rows(db_path, "SELECT id, value FROM metadata ORDER BY id") == before
+    assert rows(db_path, "SELECT new_target FROM targets") == [(200,)]
+    assert rows(db_path, "SELECT region, timestamp FROM actuals") == [(REGION, '2024-01-01 09:00:00')]
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import app
+
+REGION, CATEGORY = app.REGIONS_ORDER[0], app.CATEGORIES_ORDER[0]
+
+
+@pytest.fixture
+def history(add_actual):
+    # 1시간 간격 실적 10건 (순증 마감 = i)
+    start = datetime(2024, 1, 1)
+    for i in range(10):
+        add_actual(REGION, CATEGORY, (0, i, 0, 0), (start + timedelta(hours=i)).strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def get(client, **params):
+    return client.get('/api/history', query_string={'region': REGION, 'category': CATEGORY, **params})
+
+
+def test_keyset_pages_cover_every_row_once(client, history):
+    seen, cursor = [], None
+    while True:
+        data = get(client, limit=3, **({'cursor': cursor} if cursor else {})).get_json()
+        seen += [item['net_actual_close'] for item in data['items']]
+        cursor = data['next_cursor']
+        if cursor is None: break
+    assert seen == list(range(10))
+
+
+def test_from_to_filters_by_utc_timestamp(client, history):
+    items = get(client, **{'from': '2024-01-01 02:00:00', 'to': '2024-01-01 04:00:00'}).get_json()['items']
+    assert [i['timestamp'] for i in items] == ['2024-01-01 02:00:00', '2024-01-01 03:00:00', '2024-01-01 04:00:00']
+    # 시간대가 붙은 값은 UTC 로 환산 (+09:00 의 11시 = UTC 2시)
+    items = get(client, **{'from': '2024-01-01T11:00:00+09:00', 'to': '2024-01-01T11:00:00+09:00'}).get_json()['items']
+    assert [i['net_actual_close'] for i in items] == [2]
+    # 날짜만 주면 to 는 그날 끝까지
+    assert len(get(client, to='2024-01-01').get_json()['items']) == 10
+
+
+@pytest.mark.parametrize('points', [1, 2, 3, 5])
+def test_downsampling_is_bounded(client, history, points):
+    data = get(client, points=points).get_json()
+    assert data['downsampled'] and data['next_cursor'] is None
+    expected = max(points, app.HISTORY_MIN_POINTS)
+    assert len(data['items']) == expected
+    assert data['items'][0]['net_actual_close'] == 0 and data['items'][-1]['net_actual_close'] == 9
+
+
+def test_minmax_keeps_bucket_extremes(client, history):
+    items = get(client, points=4, mode='minmax').get_json()['items']
+    values = [i['net_actual_close'] for i in items]
+    assert 0 in values and 9 in values and len(values) <= 4
+
+
+def test_lttb_keeps_spike():
+    x = np.arange(100, dtype=np.float64)
+    y = np.zeros(100)
+    y[57] = 100
+    assert 57 in app.lttb_indices(x, y, 10).tolist()
+
+
+def test_empty_range_returns_no_items(client, history):
+    for params in ({'from': '2030-01-01'}, {'from': '2030-01-01', 'points': 10}):
+        assert get(client, **params).get_json()['items'] == []
+
+
+@pytest.mark.parametrize('params', [
+    {'cursor': '123'}, {'cursor': '1_2_3'}, {'cursor': 'a_b'},
+    {'from': 'yesterday'}, {'limit': 'x'}, {'points': 'x'},
+])
+def test_malformed_parameters_are_400(client, params):
+    assert get(client, **params).status_code == 400
+
+
+def test_unknown_dimension_is_400(client):
+    assert client.get('/api/history', query_string={'region': '없는지역', 'category': CATEGORY}).status_code == 400
@@ -0,0 +1,60 @@
+import io
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+
+import app
+
+REGION, OTHER_REGION = app.REGIONS_ORDER[0], app.REGIONS_ORDER[1]
+CATEGORY, OTHER_CATEGORY = app.CATEGORIES_ORDER[0], app.CATEGORIES_ORDER[1]
+
+
+def load_data(path):
+    conn = sqlite3.connect(path)
+    try:
+        return app.load_pack_data(conn)
+    finally:
+        conn.close()
+
+
+def workbook_values(content):
+    wb = openpyxl.load_workbook(io.BytesIO(content))
+    return {ws.title: [list(row) for row in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
+
+
+def test_pack_has_category_summary_and_total_sheets(db_path, add_actual, add_target):
+    add_target(REGION, CATEGORY, 100, 10)
+    add_actual(REGION, CATEGORY, (10, 20, 1, 2), '2024-01-01 09:00:00')
+    add_actual(REGION, CATEGORY, (30, 40, 3, 4), '2024-01-02 09:00:00')
+    add_actual(OTHER_REGION, OTHER_CATEGORY, (5, 6, 0, 1), '2024-01-01 09:00:00')
+
+    sheets = workbook_values(app.render_meeting_pack(load_data(db_path)))
+    assert list(sheets) == [CATEGORY, OTHER_CATEGORY, '지역별 요약', '전체 합계']
+    # 카테고리 시트는 전체 이력 (2단 헤더 + 행), 최신순
+    assert len(sheets[CATEGORY]) == 2 + 2
+    assert sheets[CATEGORY][2][:2] == [REGION, CATEGORY] and sheets[CATEGORY][2][5] == 40
+
+    # 요약은 (지역, 카테고리)별 최신 실적만 합산, 마지막 행은 합계
+    summary = {row[0]: row for row in sheets['지역별 요약'][2:]}
+    assert summary[REGION][1] == 100 and summary[REGION][4] == 40
+    assert summary['합계'][4] == 40 + 6
+
+
+def test_parallel_render_matches_serial(db_path, add_actual):
+    for day in range(1, 20):
+        for region in app.REGIONS_ORDER[:3]:
+            add_actual(region, app.CATEGORIES_ORDER[day % 3], (day, day * 2, 1, 1), f'2024-01-{day:02d} 09:00:00')
+    data = load_data(db_path)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        parallel = app.render_meeting_pack(data, executor=pool)
+    assert workbook_values(parallel) == workbook_values(app.render_meeting_pack(data))
+
+
+def test_pack_is_cached_by_data_version(db_path, add_actual):
+    assert app.build_meeting_pack(db_path) is None
+    add_actual(REGION, CATEGORY)
+    first = app.build_meeting_pack(db_path)
+    assert app.build_meeting_pack(db_path) is first
+    add_actual(REGION, CATEGORY, (1, 2, 3, 4), '2024-01-03 09:00:00')
+    assert app.build_meeting_pack(db_path) is not first
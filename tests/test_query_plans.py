@@ -0,0 +1,41 @@
+# app.SQL 전체 실행 계획/시간 예산 점검 (benchmark.py plans 와 같은 기대치를 작은 합성 DB 로 확인)
+import sqlite3
+
+import pytest
+
+import app
+import benchmark
+
+ROWS = 20000
+
+
+@pytest.fixture(scope='module')
+def plan_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('plans') / 'plans.db')
+    benchmark.make_synthetic_db(path, ROWS)
+    app.freeze_snapshot(path, 'plans', '2024-01', 0)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("ANALYZE")
+    yield conn, benchmark.plan_ids(conn, path)
+    conn.close()
+
+
+def test_every_statement_has_an_expectation():
+    assert benchmark.expectation_problems() == []
+
+
+@pytest.mark.parametrize('name', sorted(app.SQL))
+def test_statement_plan_and_budget(plan_db, name):
+    conn, ids = plan_db
+    plan, elapsed, budget, problems = benchmark.check_statement(conn, name, ids)
+    assert problems == [], f"{name}: {plan}"
+
+
+def test_full_scan_on_hot_path_is_reported():
+    plan = ['SCAN actuals_data']
+    expectation = dict(uses=[], hot=True)
+    assert benchmark.check_plan('x', "SELECT * FROM actuals_data", plan, expectation)
+    # scans 에 적어도 actuals_data 전체 스캔은 허용하지 않음
+    assert benchmark.check_plan('x', "SELECT * FROM actuals_data", plan, {**expectation, 'scans': ['actuals_data']})
+    assert benchmark.check_plan('x', "SELECT * FROM metadata", ['SCAN metadata'], expectation)
+    assert not benchmark.check_plan('x', "SELECT * FROM metadata", ['SCAN metadata'], {**expectation, 'scans': ['metadata']})
@@ -0,0 +1,70 @@
+import sqlite3
+
+import app
+
+REGION, OTHER_REGION = app.REGIONS_ORDER[0], app.REGIONS_ORDER[1]
+CATEGORY = app.CATEGORIES_ORDER[0]
+
+
+def test_metadata_api_follows_sort_order(client):
+    data = client.get('/api/metadata').get_json()
+    assert data == {"regions": app.REGIONS_ORDER, "categories": app.CATEGORIES_ORDER}
+
+    client.post('/submit_metadata', data={'type': 'region', 'value': '신규지역', 'sort_order': '-1'})
+    client.post('/submit_metadata', data={'type': 'region', 'value': OTHER_REGION, 'active': '0'})
+    regions = client.get('/api/metadata').get_json()['regions']
+    assert regions[0] == '신규지역' and OTHER_REGION not in regions
+
+
+def test_unknown_or_inactive_dimensions_are_rejected(client):
+    form = {'region': '없는지역', 'category': CATEGORY, 'new_target': '10', 'cancel_target': '1'}
+    assert client.post('/submit_target', data=form).status_code == 400
+
+    client.post('/submit_metadata', data={'type': 'region', 'value': REGION, 'active': '0'})
+    assert client.post('/submit_target', data={**form, 'region': REGION}).status_code == 400
+    assert client.get('/api/dashboard', query_string={'category': '없는카테고리'}).status_code == 400
+
+
+def test_dashboard_sorted_by_metadata_order(client, add_target):
+    add_target(OTHER_REGION, CATEGORY, 10, 1)
+    add_target(REGION, CATEGORY, 10, 1)
+    client.post('/submit_metadata', data={'type': 'region', 'value': OTHER_REGION, 'sort_order': '-1'})
+    rows = client.get('/api/dashboard', query_string={'category': CATEGORY}).get_json()
+    assert [r['region'] for r in rows] == [OTHER_REGION, REGION]
+
+
+def test_registry_reloads_only_on_metadata_change(db_path, add_actual, add_target):
+    conn = sqlite3.connect(db_path)
+    try:
+        registry = app.get_registry(conn)
+        add_actual(REGION, CATEGORY)
+        add_target(REGION, CATEGORY, 10, 1)
+        assert app.get_registry(conn) is registry
+
+        conn.execute("UPDATE metadata SET active = 0 WHERE type = 'region' AND value = ?", (REGION,))
+        conn.commit()
+        reloaded = app.get_registry(conn)
+        assert reloaded is not registry and not reloaded.is_active('region', REGION)
+    finally:
+        conn.close()
+
+
+def test_legacy_metadata_is_migrated(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE metadata (type TEXT, value TEXT, PRIMARY KEY(type, value))")
+    conn.executemany("INSERT INTO metadata VALUES (?, ?)",
+                     [('region', '기타지역'), ('region', OTHER_REGION), ('region', REGION), ('channel', '온라인')])
+    conn.commit()
+    conn.close()
+
+    app.init_db(path)
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT value, active FROM metadata WHERE type = 'region' ORDER BY sort_order").fetchall()
+        other = conn.execute("SELECT value FROM metadata WHERE type = 'channel'").fetchall()
+    finally:
+        conn.close()
+    # 기본 목록 순서가 우선, 목록 밖 값은 뒤에 비활성으로 보존
+    assert rows == [(REGION, 1), (OTHER_REGION, 1), ('기타지역', 0)]
+    assert other == [('온라인',)]
@@ -0,0 +1,55 @@
+import pytest
+
+import app
+
+REGION, OTHER_REGION = app.REGIONS_ORDER[0], app.REGIONS_ORDER[1]
+CATEGORY = app.CATEGORIES_ORDER[0]
+
+
+@pytest.fixture
+def replica(db_path, monkeypatch):
+    # 주기 갱신 스레드가 테스트 중에 끼어들지 않도록 주기를 길게 두고 refresh() 를 직접 호출
+    monkeypatch.setattr(app, 'READ_REPLICA', True)
+    monkeypatch.setattr(app, 'REPLICA_REFRESH_SECONDS', 3600)
+    return app.get_replica()
+
+
+def dashboard(client):
+    return client.get('/api/dashboard', query_string={'category': CATEGORY}).get_json()
+
+
+def test_replica_matches_disk_reads(client, add_target, add_actual, monkeypatch):
+    add_target(REGION, CATEGORY, 100, 10)
+    add_target(OTHER_REGION, CATEGORY, 50, 5)
+    add_actual(REGION, CATEGORY, (1, 30, 0, 3), '2024-01-01 09:00:00')
+    add_actual(REGION, CATEGORY, (1, 40, 0, 4), '2024-01-02 09:00:00')
+    expected = dashboard(client)
+    target = client.get('/api/get_target', query_string={'region': REGION, 'category': CATEGORY}).get_json()
+
+    monkeypatch.setattr(app, 'READ_REPLICA', True)
+    monkeypatch.setattr(app, 'REPLICA_REFRESH_SECONDS', 3600)
+    assert dashboard(client) == expected
+    assert client.get('/api/get_target', query_string={'region': REGION, 'category': CATEGORY}).get_json() == target
+    assert client.get('/api/dashboard', query_string={'category': '없는카테고리'}).status_code == 400
+
+
+def test_incremental_refresh_keeps_latest_by_timestamp(client, replica, add_target, add_actual):
+    add_target(REGION, CATEGORY, 100, 10)
+    add_actual(REGION, CATEGORY, (1, 40, 0, 4), '2024-01-02 09:00:00')
+    replica.refresh()
+    assert dashboard(client)[0]['net_actual_close'] == 36
+
+    # 나중에 입력됐지만 시각이 더 이른 실적은 최신값을 바꾸지 않음
+    add_actual(REGION, CATEGORY, (1, 10, 0, 1), '2024-01-01 09:00:00')
+    replica.refresh()
+    assert dashboard(client)[0]['net_actual_close'] == 36
+
+    add_actual(REGION, CATEGORY, (1, 70, 0, 7), '2024-01-03 09:00:00')
+    replica.refresh()
+    assert dashboard(client)[0]['net_actual_close'] == 63
+
+
+def test_metadata_change_reaches_replica(client, replica):
+    client.post('/submit_metadata', data={'type': 'region', 'value': REGION, 'active': '0'})
+    replica.refresh()
+    assert REGION not in client.get('/api/metadata').get_json()['regions']
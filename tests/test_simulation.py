@@ -0,0 +1,93 @@
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+import app
+
+REGION, OTHER_REGION = app.REGIONS_ORDER[0], app.REGIONS_ORDER[1]
+CATEGORY = app.CATEGORIES_ORDER[0]
+
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / 'backups')
+    monkeypatch.setattr(app, 'BACKUP_DIR', path)
+    return path
+
+
+def monthly(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT period, new_actual_close FROM actuals_monthly ORDER BY period").fetchall()
+    conn.close()
+    return rows
+
+
+def simulate(client, **params):
+    return client.post('/api/simulate', json={'new_goal': 100, 'cancel_goal': 0, 'scenarios': 0, **params})
+
+
+def target_of(result, region):
+    return sum(t['new_target'] for t in result['targets'] if t['region'] == region)
+
+
+def test_allocation_matches_goal_exactly():
+    targets = app.allocate_targets(10, np.array([1.0, 1.0, 1.0]))
+    assert targets.tolist() == [4, 3, 3]
+    assert app.allocate_targets(7, np.array([[0.5, 0.25], [0.25, 0.0]])).sum() == 7
+
+
+def test_monthly_rollup_keeps_latest_row(db_path, add_actual):
+    add_actual(REGION, CATEGORY, (1, 20, 0, 0), '2024-01-20 09:00:00')
+    add_actual(REGION, CATEGORY, (1, 10, 0, 0), '2024-01-05 09:00:00')
+    add_actual(REGION, CATEGORY, (1, 30, 0, 0), '2024-02-01 09:00:00')
+    assert monthly(db_path) == [('2024-01', 20), ('2024-02', 30)]
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM actuals_data WHERE new_actual_close = 20")
+    conn.execute("UPDATE actuals_data SET new_actual_close = 35 WHERE new_actual_close = 30")
+    conn.commit()
+    conn.close()
+    assert monthly(db_path) == [('2024-01', 10), ('2024-02', 35)]
+
+
+def test_monthly_backfill_runs_after_backup(tmp_path, backup_dir, add_actual, db_path):
+    path = str(tmp_path / 'old.db')
+    app.init_db(path)
+    add_actual(REGION, CATEGORY, (1, 20, 0, 0), '2024-01-20 09:00:00', path=path)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE actuals_monthly")
+    conn.commit()
+    conn.close()
+
+    app.init_db(path)
+    assert [n for n in os.listdir(backup_dir) if n.endswith('_premigration.db.gz')]
+    assert monthly(path) == [('2024-01', 20)]
+
+
+def test_history_rule_follows_completed_closes(client, add_actual):
+    # 완료된 달의 마감 실적 비율(3:1)로 배분
+    add_actual(REGION, CATEGORY, (1, 30, 0, 3), '2024-01-31 09:00:00')
+    add_actual(OTHER_REGION, CATEGORY, (1, 10, 0, 1), '2024-01-31 09:00:00')
+    result = simulate(client).get_json()
+    assert result['new_goal'] == 100 and not result['fallback_to_equal']
+    assert target_of(result, REGION) == 75 and target_of(result, OTHER_REGION) == 25
+
+    result = simulate(client, scenarios=200, seed=1).get_json()
+    assert result['simulation']['scenarios'] == 200 and result['simulation']['regions'][-1]['region'] == '전체'
+    assert simulate(client, rule='nope').status_code == 400
+
+
+def test_commit_rejects_stale_version(client, add_actual):
+    add_actual(REGION, CATEGORY, (1, 30, 0, 0), '2024-01-31 09:00:00')
+    version = simulate(client).get_json()['data_version']
+    add_actual(OTHER_REGION, CATEGORY, (1, 10, 0, 0), '2024-01-31 09:00:00')
+    response = client.post('/api/simulate/commit', json={'new_goal': 100, 'cancel_goal': 0, 'data_version': version})
+    assert response.status_code == 409
+
+    version = simulate(client).get_json()['data_version']
+    response = client.post('/api/simulate/commit', json={'new_goal': 100, 'cancel_goal': 0, 'data_version': version})
+    assert response.status_code == 200
+    target = client.get('/api/get_target', query_string={'region': REGION, 'category': CATEGORY}).get_json()
+    assert target['new_target'] == 75
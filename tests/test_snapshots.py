@@ -0,0 +1,151 @@
+import io
+import os
+import sqlite3
+import time
+import zipfile
+
+import openpyxl
+import pytest
+
+import app
+
+REGION, CATEGORY = app.REGIONS_ORDER[0], app.CATEGORIES_ORDER[0]
+
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / 'backups')
+    monkeypatch.setattr(app, 'BACKUP_DIR', path)
+    return path
+
+
+def snapshot_actuals(path, snapshot_id):
+    conn = sqlite3.connect(path)
+    rows = conn.execute(app.SQL['snapshot_actuals'], (snapshot_id,)).fetchall()
+    conn.close()
+    return rows
+
+
+def test_export_rows_survive_live_edits(db_path, add_actual):
+    add_actual(REGION, CATEGORY, (1, 10, 0, 1), '2024-01-01 09:00:00')
+    add_actual(REGION, CATEGORY, (2, 20, 0, 2), '2024-01-02 09:00:00')
+    snapshot_id = app.freeze_snapshot(db_path, 'close', '2024-01', 0)
+    frozen = snapshot_actuals(db_path, snapshot_id)
+    assert [r[3] for r in frozen] == [20, 10]
+
+    # 실시간 실적은 계속 수정/삭제 가능 (스냅샷은 자기 사본을 씀)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE actuals_data SET new_actual_close = 99")
+    conn.execute("DELETE FROM actuals_data WHERE ts < 1704153600")
+    conn.commit()
+    assert not conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'actuals_data' AND name LIKE 'freeze%'").fetchall()
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("DELETE FROM snapshot_actuals")
+    conn.close()
+    assert snapshot_actuals(db_path, snapshot_id) == frozen
+
+
+def test_old_snapshots_are_backfilled_after_backup(tmp_path, backup_dir, add_actual, db_path):
+    path = str(tmp_path / 'old.db')
+    app.init_db(path)
+    add_actual(REGION, CATEGORY, (1, 10, 0, 1), '2024-01-01 09:00:00', path=path)
+    snapshot_id = app.freeze_snapshot(path, 'close', '2024-01', 0)
+    # snapshot_actuals 가 생기기 전의 스키마
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE snapshot_actuals")
+    conn.commit()
+    conn.close()
+
+    app.init_db(path)
+    assert [n for n in os.listdir(backup_dir) if n.endswith('_premigration.db.gz')]
+    assert [r[3] for r in snapshot_actuals(path, snapshot_id)] == [10]
+    # 이관이 끝난 DB 는 다시 백업하지 않음
+    app.init_db(path)
+    assert len(os.listdir(backup_dir)) == 1
+
+
+def read_export(content):
+    # download.zip 안의 엑셀: 1행 그룹(병합), 2행 항목명, 3행부터 값
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        sheet = openpyxl.load_workbook(io.BytesIO(zf.read('회의자료_동기화결과.xlsx'))).active
+    return [[c.value for c in row] for row in sheet.iter_rows()], {str(r) for r in sheet.merged_cells.ranges}
+
+
+def test_download_writes_grouped_header(client, add_target, add_actual):
+    add_target(REGION, CATEGORY, 100, 10)
+    add_actual(REGION, CATEGORY, (1, 30, 0, 3), '2024-01-01 09:00:00')
+    response = client.get('/download')
+    assert response.status_code == 200
+    rows, merged = read_export(response.data)
+    assert rows[0][:3] == ['기본정보', None, '신규'] and rows[1][:3] == ['지역', '카테고리', '목표']
+    assert rows[2][:4] == [REGION, CATEGORY, 100, 1] and rows[2][-1] == '2024-01-01 09:00:00'
+    assert {'A1:B1', 'C1:I1'} <= merged and len(rows) == 3
+
+
+def test_checkpoint_snapshot_is_served_until_live(client, add_target, add_actual):
+    add_target(REGION, CATEGORY, 100, 10)
+    add_actual(REGION, CATEGORY, (1, 30, 0, 3), '2024-01-01 09:00:00')
+    snapshot_id = app.freeze_snapshot(app.DB_NAME, 'close', '2024-01', time.time())
+    add_actual(REGION, CATEGORY, (1, 50, 0, 5), '2024-01-02 09:00:00')
+
+    frozen = client.get('/download')
+    assert frozen.headers['X-Snapshot'] == str(snapshot_id)
+    assert len(read_export(frozen.data)[0]) == 3
+    assert len(read_export(client.get('/download', query_string={'live': '1'}).data)[0]) == 4
+    dashboard = client.get('/api/dashboard', query_string={'category': CATEGORY})
+    assert dashboard.headers['X-Snapshot-Label'] == 'close' and dashboard.get_json()[0]['net_actual_close'] == 27
+
+
+def test_manual_snapshot_is_only_served_on_request(client, add_actual):
+    add_actual(REGION, CATEGORY)
+    snapshot_id = client.post('/api/snapshots').get_json()['snapshot']
+    assert 'X-Snapshot' not in client.get('/download').headers
+    assert client.get('/download', query_string={'snapshot': snapshot_id}).headers['X-Snapshot'] == str(snapshot_id)
+
+
+def test_artifact_cache_is_capped_by_bytes(db_path, monkeypatch):
+    monkeypatch.setattr(app, 'SNAPSHOT_CACHE_BYTES', 10)
+    monkeypatch.setattr(app, '_artifact_cache', app.OrderedDict())
+    monkeypatch.setattr(app, '_artifact_cache_bytes', 0)
+    app.cache_artifact((db_path, 1, 'a'), b'12345')
+    app.cache_artifact((db_path, 1, 'b'), b'12345')
+    app.cache_artifact((db_path, 1, 'c'), b'123')
+    assert list(app._artifact_cache) == [(db_path, 1, 'b'), (db_path, 1, 'c')] and app._artifact_cache_bytes == 8
+    # 상한보다 큰 결과물은 캐시하지 않음
+    app.cache_artifact((db_path, 1, 'd'), b'x' * 11)
+    assert (db_path, 1, 'd') not in app._artifact_cache
+    app.drop_snapshot_artifacts(db_path)
+    assert not app._artifact_cache and app._artifact_cache_bytes == 0
+
+
+def test_server_start_runs_snapshot_scheduler(monkeypatch):
+    started = []
+    monkeypatch.setattr(app, 'SCHEDULERS_ENABLED', True)
+    monkeypatch.setattr(app, '_schedulers_started', False)
+    monkeypatch.setattr(app, 'start_backup_scheduler', lambda: started.append('backup'))
+    monkeypatch.setattr(app, 'start_snapshot_scheduler', lambda: started.append('snapshot'))
+    app.start_schedulers()
+    app.start_schedulers()
+    assert started == ['backup', 'snapshot']
+
+
+def test_without_rowid_artifacts_are_rebuilt_after_backup(tmp_path, backup_dir, db_path):
+    path = str(tmp_path / 'old.db')
+    app.init_db(path)
+    # 이전 스키마: 결과물 표가 WITHOUT ROWID
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE snapshot_artifacts")
+    conn.execute('''CREATE TABLE snapshot_artifacts (snapshot_id INTEGER NOT NULL, name TEXT NOT NULL, content BLOB NOT NULL,
+                    PRIMARY KEY(snapshot_id, name)) WITHOUT ROWID''')
+    conn.execute("INSERT INTO snapshot_artifacts VALUES (1, 'pack.xlsx', x'0102')")
+    conn.commit()
+    conn.close()
+
+    app.init_db(path)
+    assert [n for n in os.listdir(backup_dir) if n.endswith('_premigration.db.gz')]
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT wr FROM pragma_table_list WHERE name = 'snapshot_artifacts'").fetchone() == (0,)
+    assert conn.execute(app.SQL['snapshot_artifact'], (1, 'pack.xlsx')).fetchone() == (b'\x01\x02',)
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("DELETE FROM snapshot_artifacts")
+    conn.close()
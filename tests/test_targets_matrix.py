@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+import app
+
+REGION, OTHER_REGION = app.REGIONS_ORDER[0], app.REGIONS_ORDER[1]
+CATEGORY, OTHER_CATEGORY = app.CATEGORIES_ORDER[0], app.CATEGORIES_ORDER[1]
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def test_target_lookup_and_defaults(client, add_target):
+    add_target(REGION, CATEGORY, 100, 10)
+    get = lambda r, c: client.get('/api/get_target', query_string={'region': r, 'category': c}).get_json()
+    assert get(REGION, CATEGORY) == {"new_target": 100, "cancel_target": 10}
+    assert get(OTHER_REGION, CATEGORY) == {"new_target": 0, "cancel_target": 0}
+
+
+def test_dashboard_rates_follow_region_order(client, add_target, add_actual):
+    add_target(OTHER_REGION, CATEGORY, 100, 20)
+    add_target(REGION, CATEGORY, 50, 0)
+    add_target(REGION, OTHER_CATEGORY, 10, 0)
+    add_actual(OTHER_REGION, CATEGORY, (0, 60, 0, 20))
+    rows = client.get('/api/dashboard', query_string={'category': CATEGORY}).get_json()
+    assert rows == [
+        {"region": REGION, "net_target": 50, "net_actual_close": None, "achievement_rate": None},
+        {"region": OTHER_REGION, "net_target": 80, "net_actual_close": 40, "achievement_rate": 50.0},
+    ]
+
+
+def test_matrix_is_not_reloaded_for_actuals(conn, add_target, add_actual):
+    add_target(REGION, CATEGORY, 100, 10)
+    matrix = app.get_targets_matrix(conn)
+    add_actual(REGION, CATEGORY)
+    assert app.get_targets_matrix(conn) is matrix
+
+    # 다른 연결(프로세스)의 목표 변경은 버전으로 감지
+    add_target(REGION, CATEGORY, 300, 30)
+    reloaded = app.get_targets_matrix(conn)
+    assert reloaded is not matrix and reloaded.target(REGION, CATEGORY) == {"new_target": 300, "cancel_target": 30}
+
+
+def test_save_targets_publishes_copy(conn, add_target):
+    add_target(REGION, CATEGORY, 100, 10)
+    before = app.get_targets_matrix(conn)
+    registry = app.get_registry(conn)
+    app.save_targets(conn, [(registry.id_of('region', OTHER_REGION), registry.id_of('category', CATEGORY), 70, 7)])
+
+    after = app.get_targets_matrix(conn)
+    assert after is not before and after.version == app.get_targets_version(conn)
+    assert after.target(OTHER_REGION, CATEGORY) == {"new_target": 70, "cancel_target": 7}
+    assert after.target(REGION, CATEGORY) == {"new_target": 100, "cancel_target": 10}
+    # 이미 읽어 간 행렬은 그대로이고 쓰기 불가
+    assert before.target(OTHER_REGION, CATEGORY) == {"new_target": 0, "cancel_target": 0}
+    assert not after.new.flags.writeable
+
+
+def test_metadata_change_reshapes_matrix(client, conn):
+    shape = app.get_targets_matrix(conn).new.shape
+    client.post('/submit_metadata', data={'type': 'region', 'value': '신규지역'})
+    client.post('/submit_target', data={'region': '신규지역', 'category': CATEGORY, 'new_target': '5', 'cancel_target': '1'})
+    matrix = app.get_targets_matrix(conn)
+    assert matrix.new.shape == (shape[0] + 1, shape[1])
+    assert matrix.target('신규지역', CATEGORY) == {"new_target": 5, "cancel_target": 1}
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import app
+
+REGION, CATEGORY = app.REGIONS_ORDER[0], app.CATEGORIES_ORDER[0]
+
+
+@pytest.fixture
+def tenants(db_path, monkeypatch):
+    monkeypatch.setattr(app, 'TENANT_AUTO_CREATE', True)
+    return app.get_tenants()
+
+
+def set_target(client, value, prefix='', headers=None):
+    form = {'region': REGION, 'category': CATEGORY, 'new_target': str(value), 'cancel_target': '0'}
+    return client.post(f'{prefix}/submit_target', data=form, headers=headers or {})
+
+
+def get_target(client, prefix='', headers=None):
+    response = client.get(f'{prefix}/api/get_target', query_string={'region': REGION, 'category': CATEGORY}, headers=headers or {})
+    return response.get_json()['new_target']
+
+
+def test_path_prefix_and_header_route_to_separate_files(client, tenants):
+    set_target(client, 100, prefix='/t/acme')
+    set_target(client, 200, headers={app.TENANT_HEADER: 'beta'})
+    set_target(client, 300)
+
+    assert get_target(client, headers={app.TENANT_HEADER: 'acme'}) == 100
+    assert get_target(client, prefix='/t/beta') == 200
+    assert get_target(client) == 300
+    assert sorted(os.listdir(app.TENANT_DIR)) == ['acme.db', 'beta.db']
+
+
+def test_unknown_and_invalid_tenants(client, db_path):
+    assert client.get('/t/nobody/api/metadata').status_code == 404
+    assert client.get('/api/metadata', headers={app.TENANT_HEADER: '../etc'}).status_code == 400
+    assert not os.path.exists(app.TENANT_DIR)
+
+
+def test_tenant_list_is_not_exposed(client, tenants):
+    set_target(client, 100, prefix='/t/acme')
+    assert client.get('/api/tenants').status_code == 404
+    assert client.get('/t/acme/api/tenants').status_code == 404
+
+
+def test_admission_is_per_tenant(client, tenants, monkeypatch):
+    monkeypatch.setitem(app.ADMISSION_LIMITS, 'download_pack', (1, 0, 0.01))
+    acme = tenants.get('acme')
+    with acme.get_admission('download_pack').slot():
+        assert client.get('/t/acme/download_pack').status_code == 429
+        # 다른 조직은 영향 없음
+        assert client.get('/t/beta/download_pack').status_code == 200
+    assert tenants.get('beta').get_admission('download_pack').stats()['rejected'] == 0
+
+
+def test_singleflight_is_per_tenant(tenants):
+    acme, beta = tenants.get('acme'), tenants.get('beta')
+    assert acme.singleflight is not beta.singleflight
+    assert acme.get_admission('download') is not beta.get_admission('download')
+
+
+def test_lru_eviction_closes_tenant(client, tenants, monkeypatch):
+    monkeypatch.setattr(tenants, 'capacity', 1)
+    set_target(client, 100, prefix='/t/acme')
+    assert get_target(client, prefix='/t/acme') == 100
+    acme = tenants.get('acme')
+    assert acme.db_path in app._targets_cache
+
+    set_target(client, 200, prefix='/t/beta')
+    assert acme.closed and acme.db_path not in app._targets_cache
+    assert [t['tenant'] for t in tenants.stats()] == ['beta']
+    # 다시 접근하면 파일에서 그대로 열림
+    assert get_target(client, prefix='/t/acme') == 100
+
+
+def test_backup_rotation_does_not_cross_tenant_prefixes(tmp_path, monkeypatch):
+    backup_dir = str(tmp_path / 'backups')
+    monkeypatch.setattr(app, 'BACKUP_KEEP', 1)
+    for name in ('a', 'a_b'):
+        path = str(tmp_path / f'{name}.db')
+        app.init_db(path)
+        app.backup_database(path, backup_dir)
+    app.backup_database(str(tmp_path / 'a.db'), backup_dir)
+    assert len(app.list_backups(backup_dir, 'a')) == 1
+    assert len(app.list_backups(backup_dir, 'a_b')) == 1